@@ -1,9 +1,244 @@
 # data access object --> dao.py
 # -----------------------------
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import and_, delete, insert, select
+
+from app.bookings.partitions import ensure_partitions
+from app.cache import cache
 from app.dao.base import BaseDAO
+from app.database import async_session_maker
+from app.events import subscribe
+from app.outbox.relay import dispatch, make_event, record
+from app.pricing.dao import PricingDAO
+from app.bookings.models import Bookings, BOOKING_MAX_DAYS
+from app.hotels.models import Hotels
+from app.rooms.models import Rooms
 
-from app.bookings.models import Bookings
+# пользователь -> число изменений его броней; список, прочитанный до
+# изменения, не кэшируется (как в app/rooms/availability.py)
+_user_versions = Counter()
 
 
 class BookingDAO(BaseDAO):
     model = Bookings
+
+    @staticmethod
+    def overlapping(date_from: date, date_to: date):
+        # нижняя граница по date_from не меняет результат (бронь не длиннее
+        # BOOKING_MAX_DAYS), но позволяет планировщику отбросить старые партиции
+        return and_(
+            Bookings.date_from < date_to,
+            Bookings.date_from > date_from - timedelta(days=BOOKING_MAX_DAYS),
+            Bookings.date_to > date_from,
+        )
+
+    @staticmethod
+    def user_cache_namespace(user_id: int):
+        return ("user_bookings", user_id)
+
+    @classmethod
+    def invalidate_user_cache(cls, user_id: int):
+        _user_versions[user_id] += 1
+        cache.invalidate(cls.user_cache_namespace(user_id))
+
+    @staticmethod
+    def change_event(operation: str, booking) -> dict:
+        return make_event(
+            "bookings",
+            operation,
+            id=booking.id,
+            user_id=booking.user_id,
+            room_id=booking.room_id,
+            date_from=booking.date_from,
+            date_to=booking.date_to,
+        )
+
+    @classmethod
+    async def find_for_user(
+            cls,
+            user_id: int,
+            limit: int,
+            offset: int = 0,
+            with_rooms: bool = False,
+    ):
+        """
+        SELECT bookings.*, rooms.name, rooms.description, ..., hotels.name, hotels.location
+        FROM bookings
+        LEFT JOIN rooms ON rooms.id = bookings.room_id
+        LEFT JOIN hotels ON hotels.id = rooms.hotel_id
+        WHERE bookings.user_id = :user_id
+        ORDER BY bookings.date_from DESC, bookings.id DESC
+        LIMIT :limit OFFSET :offset
+        """
+        cache_key = (limit, offset, with_rooms)
+        cached = cache.get(cls.user_cache_namespace(user_id), cache_key)
+        if cached is not None:
+            return cached
+
+        # без join'ов запрос обслуживается index-only scan по ix_bookings_user_id_date_from
+        query = select(Bookings.__table__.columns)
+        if with_rooms:
+            query = (
+                query.add_columns(
+                    Rooms.hotel_id,
+                    Rooms.name,
+                    Rooms.description,
+                    Rooms.services,
+                    Rooms.image_id,
+                    Hotels.name.label("hotel_name"),
+                    Hotels.location.label("hotel_location"),
+                )
+                .join(Rooms, Rooms.id == Bookings.room_id, isouter=True)
+                .join(Hotels, Hotels.id == Rooms.hotel_id, isouter=True)
+            )
+        query = (
+            query.where(Bookings.user_id == user_id)
+            .order_by(Bookings.date_from.desc(), Bookings.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        version = _user_versions[user_id]
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            bookings = [dict(row) for row in result.mappings()]
+        if _user_versions[user_id] == version:
+            cache.set(cls.user_cache_namespace(user_id), cache_key, bookings)
+        return bookings
+
+    @classmethod
+    async def add(
+            cls,
+            user_id: int,
+            room_id: int,
+            date_from: date,
+            date_to: date,
+    ):
+        """
+        SELECT id, hotel_id, price, quantity FROM rooms WHERE id = :room_id FOR UPDATE;
+        свободные номера и стоимость -- PricingDAO.quote
+        """
+        await ensure_partitions(date_from)
+        async with async_session_maker() as session:
+            # блокировка строки номера сериализует параллельные брони одного номера
+            room_query = (
+                select(Rooms.id, Rooms.hotel_id, Rooms.price, Rooms.quantity)
+                .where(Rooms.id == room_id)
+                .with_for_update()
+            )
+            room = (await session.execute(room_query)).mappings().first()
+            if not room:
+                return None
+            [quote] = await PricingDAO.quote([room], [(date_from, date_to)], session=session)
+            if quote["rooms_left"] <= 0:
+                return None
+
+            add_booking = (
+                insert(Bookings)
+                .values(
+                    room_id=room_id,
+                    user_id=user_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    price=room["price"],
+                    total_cost=quote["total_cost"],
+                )
+                .returning(Bookings)
+            )
+            new_booking = (await session.execute(add_booking)).scalar()
+            events = [cls.change_event("insert", new_booking)]
+            await record(session, events)
+            await session.commit()
+        await dispatch(events)
+        return new_booking
+
+    @classmethod
+    async def add_many(cls, user_id: int, items: list[tuple[int, date, date]]):
+        """
+        Бронь нескольких номеров (в том числе в разных отелях) целиком или никак.
+        items -- (room_id, date_from, date_to); число запросов к базе не зависит
+        от числа номеров.
+
+        SELECT id, hotel_id, price, quantity FROM rooms WHERE id IN (:room_ids) ORDER BY id FOR UPDATE;
+        свободные номера и стоимость -- один вызов PricingDAO.quote;
+        INSERT INTO bookings (...) VALUES (...), (...), ... RETURNING bookings.*
+        """
+        await ensure_partitions(min(item[1] for item in items), max(item[1] for item in items))
+        async with async_session_maker() as session:
+            # блокировки в порядке id: параллельные пакеты с общими номерами
+            # не взаимоблокируются
+            room_query = (
+                select(Rooms.id, Rooms.hotel_id, Rooms.price, Rooms.quantity)
+                .where(Rooms.id.in_({room_id for room_id, _, _ in items}))
+                .order_by(Rooms.id)
+                .with_for_update()
+            )
+            rooms = {room["id"]: room for room in (await session.execute(room_query)).mappings()}
+            if len(rooms) < len({room_id for room_id, _, _ in items}):
+                return None
+            quotes = await PricingDAO.quote(
+                [rooms[room_id] for room_id, _, _ in items],
+                [(date_from, date_to) for _, date_from, date_to in items],
+                session=session,
+            )
+            # номера одного пакета занимают места друг у друга так же, как
+            # если бы брони добавлялись по одной через add: rooms_left в
+            # PricingDAO.quote -- quantity минус все пересекающиеся брони, а
+            # не пиковая загрузка по дням. Это осторожная оценка: [1, 3),
+            # [3, 5) и [2, 4) при двух свободных номерах не пройдут ни
+            # пакетом, ни по одной, хотя в каждый день заняты два номера
+            for index, ((room_id, date_from, date_to), quote) in enumerate(zip(items, quotes)):
+                taken = sum(
+                    1 for other_room_id, other_from, other_to in items[:index]
+                    if other_room_id == room_id and other_from < date_to and other_to > date_from
+                )
+                if quote["rooms_left"] - taken <= 0:
+                    return None
+
+            add_bookings = (
+                insert(Bookings)
+                .values([
+                    {
+                        "room_id": room_id,
+                        "user_id": user_id,
+                        "date_from": date_from,
+                        "date_to": date_to,
+                        "price": rooms[room_id]["price"],
+                        "total_cost": quote["total_cost"],
+                    }
+                    for (room_id, date_from, date_to), quote in zip(items, quotes)
+                ])
+                .returning(Bookings)
+            )
+            new_bookings = (await session.execute(add_bookings)).scalars().all()
+            events = [cls.change_event("insert", booking) for booking in new_bookings]
+            await record(session, events)
+            await session.commit()
+        await dispatch(events)
+        return new_bookings
+
+    @classmethod
+    async def delete(cls, booking_id: int, user_id: int):
+        async with async_session_maker() as session:
+            query = (
+                delete(Bookings)
+                .where(and_(Bookings.id == booking_id, Bookings.user_id == user_id))
+                .returning(Bookings.id, Bookings.user_id, Bookings.room_id, Bookings.date_from, Bookings.date_to)
+            )
+            deleted = (await session.execute(query)).first()
+            if deleted is None:
+                return None
+            events = [cls.change_event("delete", deleted)]
+            await record(session, events)
+            await session.commit()
+        await dispatch(events)
+        return deleted.id
+
+
+async def invalidate_user_bookings(user_id: int, **payload):
+    # события из outbox: и от этого процесса, и от других воркеров
+    BookingDAO.invalidate_user_cache(user_id)
+
+
+subscribe("bookings", invalidate_user_bookings)
@@ -1,15 +1,32 @@
-from sqlalchemy import Column, ForeignKey, Integer, Date, Computed
+from sqlalchemy import CheckConstraint, Column, ForeignKey, Index, Integer, Date, Computed
 from app.database import Base
 
+# ограничение длины брони позволяет отсекать старые партиции в запросах
+# на пересечение дат (см. BookingDAO.overlapping)
+BOOKING_MAX_DAYS = 90
+
 
 class Bookings(Base):
     __tablename__ = 'bookings'
 
-    id = Column(Integer, primary_key=True)
+    # ключ партиционирования обязан входить в первичный ключ
+    id = Column(Integer, primary_key=True, autoincrement=True)
     room_id = Column(ForeignKey("rooms.id"))
     user_id = Column(ForeignKey("users.id"))
-    date_from = Column(Date, nullable=False)
+    date_from = Column(Date, primary_key=True, nullable=False)
     date_to = Column(Date, nullable=False)
     price = Column(Integer, nullable=False)
-    total_cost = Column(Integer, Computed("(date_to - date_from) * price"))
+    # считается движком цен (app/pricing) при бронировании
+    total_cost = Column(Integer, nullable=False)
     total_days = Column(Integer, Computed("date_to - date_from"))
+
+    __table_args__ = (
+        CheckConstraint(f"date_to > date_from AND date_to - date_from <= {BOOKING_MAX_DAYS}", name="ck_bookings_stay"),
+        Index(
+            "ix_bookings_user_id_date_from", "user_id", "date_from",
+            postgresql_include=["id", "room_id", "date_to", "price", "total_cost", "total_days"],
+        ),
+        # поиск свободных номеров и котировки (PricingDAO.quote)
+        Index("ix_bookings_room_id_date_from", "room_id", "date_from", postgresql_include=["date_to"]),
+        {"postgresql_partition_by": "RANGE (date_from)"},
+    )
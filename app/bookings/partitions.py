@@ -0,0 +1,138 @@
+# Помесячные партиции таблицы bookings (PARTITION BY RANGE (date_from))
+# -----------------------------
+# Партиции заранее создаются при старте приложения на
+# BOOKING_PARTITION_MONTHS_AHEAD месяцев вперёд и, при необходимости,
+# перед вставкой брони. Старые партиции отсоединяются командой:
+#
+# python -m app.bookings.partitions ensure
+# python -m app.bookings.partitions archive --before 2024-01
+# python -m app.bookings.partitions archive --before 2024-01 --drop
+import argparse
+import asyncio
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+
+ARCHIVE_SCHEMA = "bookings_archive"
+
+_PARTITION_NAME = re.compile(r"^bookings_(\d{4})_(\d{2})$")
+
+# партиции, про которые этот процесс уже знает, что они существуют
+_known_partitions: set[str] = set()
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"bookings_{month:%Y_%m}"
+
+
+def months_between(date_from: date, date_to: date) -> list[date]:
+    months = []
+    month = month_start(date_from)
+    while month <= date_to:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+async def ensure_partitions(date_from: date, date_to: date = None):
+    months = [
+        month for month in months_between(date_from, date_to or date_from)
+        if partition_name(month) not in _known_partitions
+    ]
+    if not months:
+        return
+    # отдельная транзакция: партиция остаётся, даже если вставка откатится
+    async with engine.begin() as conn:
+        # несколько воркеров могут одновременно создавать одну и ту же партицию
+        await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('bookings_partitions'))"))
+        for month in months:
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF bookings "
+                f"FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"
+            ))
+    _known_partitions.update(partition_name(month) for month in months)
+
+
+async def ensure_partitions_ahead(today: date = None):
+    month = month_start(today or date.today())
+    await ensure_partitions(month, add_months(month, settings.BOOKING_PARTITION_MONTHS_AHEAD))
+
+
+async def list_partitions() -> list[tuple[str, date]]:
+    query = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'bookings'"
+    )
+    async with engine.connect() as conn:
+        names = (await conn.execute(query)).scalars().all()
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+async def archive_partitions(before: date, drop: bool = False) -> list[str]:
+    archived = []
+    # DETACH ... CONCURRENTLY нельзя выполнять внутри транзакции
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # DETACH CONCURRENTLY ждёт завершения всех транзакций по bookings
+        await conn.execute(text("SET statement_timeout = 0"))
+        try:
+            if not drop:
+                await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            for name, month in await list_partitions():
+                if next_month(month) > before:
+                    continue
+                await conn.execute(text(f"ALTER TABLE bookings DETACH PARTITION {name} CONCURRENTLY"))
+                if drop:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                else:
+                    await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+                _known_partitions.discard(name)
+                archived.append(name)
+        finally:
+            await conn.execute(text("RESET statement_timeout"))
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Управление партициями таблицы bookings")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ensure', help="создать партиции на ближайшие месяцы")
+    archive = commands.add_parser('archive', help="отсоединить партиции старше указанного месяца")
+    archive.add_argument('--before', required=True, help="YYYY-MM, первый месяц, который остаётся")
+    archive.add_argument('--drop', action='store_true', help="удалить вместо переноса в архивную схему")
+    args = parser.parse_args()
+
+    if args.command == 'ensure':
+        asyncio.run(ensure_partitions_ahead())
+    else:
+        before = date.fromisoformat(f"{args.before}-01")
+        archived = asyncio.run(archive_partitions(before, drop=args.drop))
+        print(f"archived: {', '.join(archived) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
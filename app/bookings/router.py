@@ -1,19 +1,76 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from app.bookings.dao import BookingDAO
+from app.bookings.schemas import SBooking, SBookingInfo, SNewBooking, SNewBookings
+from app.fields import FieldsSelector
+from app.exceptions import BookingNotFoundException, RoomCannotBeBookedException
 from app.users.dependencies import get_current_user
-from app.users.models import Users
+from app.users.schemas import SUser
 
 router = APIRouter(
     prefix="/bookings",
     tags=["Бронирования"],
 )
 
+booking_fields = FieldsSelector(SBookingInfo, exclude_none=True)
+
+
+@router.get("", response_model=list[SBookingInfo], response_model_exclude_none=True)
+async def get_bookings(
+        user: SUser = Depends(get_current_user),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        with_rooms: bool = False,
+        fields: Optional[set[str]] = Depends(booking_fields),
+):
+    bookings = await BookingDAO.find_for_user(
+        user_id=user.id,
+        limit=limit,
+        offset=offset,
+        with_rooms=with_rooms,
+    )
+    return booking_fields.response(bookings, fields)
+
+
+@router.post("")
+async def add_booking(
+        booking: SNewBooking,
+        user: SUser = Depends(get_current_user),
+) -> SBooking:
+    new_booking = await BookingDAO.add(
+        user_id=user.id,
+        room_id=booking.room_id,
+        date_from=booking.date_from,
+        date_to=booking.date_to,
+    )
+    if not new_booking:
+        raise RoomCannotBeBookedException
+    return new_booking
+
+
+@router.post("/batch")
+async def add_bookings(
+        batch: SNewBookings,
+        user: SUser = Depends(get_current_user),
+) -> list[SBooking]:
+    # все номера бронируются в одной транзакции: если хотя бы один
+    # недоступен, не создаётся ни одной брони
+    new_bookings = await BookingDAO.add_many(
+        user_id=user.id,
+        items=[(booking.room_id, booking.date_from, booking.date_to) for booking in batch.bookings],
+    )
+    if not new_bookings:
+        raise RoomCannotBeBookedException
+    return new_bookings
+
+
+@router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_booking(
+        booking_id: int,
+        user: SUser = Depends(get_current_user),
+):
+    deleted = await BookingDAO.delete(booking_id=booking_id, user_id=user.id)
+    if not deleted:
+        raise BookingNotFoundException
 
-@router.get("")
-async def get_bookings(user: Users = Depends(get_current_user)):
-    # print('* user:', user)
-    # print('* type(user):',type(user))
-    # print('* user.id',user.id)
-    # print('* user.email',user.email)
-    # return user
-    return await BookingDAO.find_all(id=1)
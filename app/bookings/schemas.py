@@ -1,5 +1,29 @@
-from pydantic import BaseModel
-from datetime import date
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, timedelta
+from typing import Optional
+
+from app.bookings.models import BOOKING_MAX_DAYS
+from app.exceptions import InvalidStayException
+
+# за пределами этих дат запросы на пересечение броней (BookingDAO.overlapping)
+# выходили бы за границы типа date
+STAY_MIN_DATE = date(2000, 1, 1)
+STAY_MAX_DATE = date(2100, 1, 1)
+
+
+def is_valid_stay(date_from: date, date_to: date) -> bool:
+    # движок цен строит матрицу номера x дни, поэтому период ограничен
+    return (
+        STAY_MIN_DATE <= date_from < date_to <= STAY_MAX_DATE
+        and date_to - date_from <= timedelta(days=BOOKING_MAX_DAYS)
+    )
+
+
+def stay_period(date_from: date, date_to: date) -> tuple[date, date]:
+    # зависимость для эндпоинтов с датами в query-параметрах
+    if not is_valid_stay(date_from, date_to):
+        raise InvalidStayException
+    return date_from, date_to
 
 
 class SBooking(BaseModel):
@@ -14,3 +38,44 @@ class SBooking(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class SBookingInfo(SBooking):
+    hotel_id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    services: Optional[list[str]] = None
+    image_id: Optional[int] = None
+    hotel_name: Optional[str] = None
+    hotel_location: Optional[str] = None
+
+
+class SNewBooking(BaseModel):
+    room_id: int
+    date_from: date
+    date_to: date
+
+    @model_validator(mode='after')
+    def check_stay(self):
+        if not is_valid_stay(self.date_from, self.date_to):
+            raise ValueError(InvalidStayException.detail)
+        return self
+
+
+# больше номеров за раз -- уже не групповая бронь, а выгрузка
+BOOKINGS_BATCH_MAX = 50
+# от первого заезда до последнего выезда: PricingDAO.quote считает
+# все брони пакета в одном окне дат
+BOOKINGS_BATCH_MAX_DAYS = 2 * BOOKING_MAX_DAYS
+
+
+class SNewBookings(BaseModel):
+    bookings: list[SNewBooking] = Field(min_length=1, max_length=BOOKINGS_BATCH_MAX)
+
+    @model_validator(mode='after')
+    def check_window(self):
+        first = min(booking.date_from for booking in self.bookings)
+        last = max(booking.date_to for booking in self.bookings)
+        if last - first > timedelta(days=BOOKINGS_BATCH_MAX_DAYS):
+            raise ValueError(f"Брони пакета должны укладываться в {BOOKINGS_BATCH_MAX_DAYS} дней")
+        return self
@@ -0,0 +1,59 @@
+# Простой кэш в памяти процесса: TTL + вытеснение по LRU
+# -----------------------------
+# Ключи группируются по пространствам имён (namespace), чтобы можно было
+# одним вызовом сбросить, например, все закэшированные страницы броней
+# одного пользователя.
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._namespaces: dict = {}
+
+    def get(self, namespace, key):
+        item = self._data.get((namespace, key))
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._delete((namespace, key))
+            return None
+        self._data.move_to_end((namespace, key))
+        return value
+
+    def set(self, namespace, key, value, ttl: float = None):
+        full_key = (namespace, key)
+        self._data[full_key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(full_key)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._delete(next(iter(self._data)))
+
+    def keys(self, namespace) -> list:
+        return list(self._namespaces.get(namespace, ()))
+
+    def invalidate(self, namespace):
+        for key in self._namespaces.pop(namespace, ()):
+            self._data.pop((namespace, key), None)
+
+    def clear(self):
+        self._data.clear()
+        self._namespaces.clear()
+
+    def _delete(self, full_key):
+        self._data.pop(full_key, None)
+        namespace, key = full_key
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[namespace]
+
+
+cache = TTLCache(ttl=settings.CACHE_TTL, maxsize=settings.CACHE_MAXSIZE)
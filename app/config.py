@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +12,58 @@ class Settings(BaseSettings):
 
     ENCRYPTION_KEY: str
     ENCRYPTION_ALGORITHM: str
+    # каталог с ключами <kid>.<RS256|ES256>.pem, см. app/users/keys.py
+    JWT_KEYS_DIR: Optional[str] = None
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2id"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # 0 -- не подбирать стоимость при старте, использовать PASSWORD_BCRYPT_ROUNDS
+    PASSWORD_HASH_TARGET_MS: int = 250
+
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # доступ к /admin/*, /metrics/*, /auth/all
+    ADMIN_EMAILS: list[str] = []
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+    # миграции под нагрузкой, см. app/migrations/online.py
+    MIGRATION_LOCK_TIMEOUT_MS: int = 5_000
+    MIGRATION_BACKFILL_BATCH: int = 5_000
+    MIGRATION_BACKFILL_PAUSE: float = 0.1
+    # бюджет времени HTTP-запроса, см. app/deadlines.py
+    REQUEST_TIMEOUT: float = 30
+
+    LOG_LEVEL: str = "INFO"
+    SLOW_QUERY_MS: int = 200
+    # доля остальных SQL-запросов, попадающих в лог (при LOG_LEVEL=DEBUG)
+    SQL_LOG_SAMPLE_RATE: float = 0.01
+
+    # 0 -- не следить за блокировками event loop, см. app/profiling/loop_monitor.py
+    LOOP_STALL_THRESHOLD_MS: int = 100
+    PROFILING_MAX_SECONDS: int = 60
+
+    REDIS_URL: Optional[str] = None
+    # сколько секунд хранится ответ для Idempotency-Key
+    IDEMPOTENCY_TTL: int = 24 * 3600
+
+    BOOKING_PARTITION_MONTHS_AHEAD: int = 12
+
+    CACHE_TTL: int = 60
+    # outbox, см. app/outbox/relay.py
+    OUTBOX_POLL_INTERVAL: float = 5
+    OUTBOX_LOOKBACK: float = 60
+    OUTBOX_RETENTION: int = 24 * 3600
+    PRICING_RATES_TTL: int = 300
+    CACHE_MAXSIZE: int = 10_000
+
+    # прогрев кэша поиска отелей, см. app/hotels/search_cache.py
+    WARMUP_LOCATIONS: list[str] = []
+    WARMUP_DAYS_AHEAD: int = 14
+    WARMUP_STAY_NIGHTS: list[int] = [1, 2, 3, 7]
+    WARMUP_TOP_SEARCHES: int = 50
+    WARMUP_INTERVAL: int = 300
 
     class Config:
         env_file = ".env"
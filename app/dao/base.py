@@ -3,12 +3,42 @@
 from sqlalchemy.dialects.postgresql.pg_catalog import pg_enum
 
 from app.database import async_session_maker
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, update
+from pydantic import TypeAdapter
+from app.events import subscribe
+from app.outbox.relay import dispatch, make_event, record
+from app.singleflight import get_flight
+
+_list_adapters: dict = {}
+
+rows_flight = get_flight("dao_reads")
+# таблица -> номер версии, растёт с каждым событием об изменении таблицы
+_table_versions: dict[str, int] = {}
+
+
+def list_adapter(schema) -> TypeAdapter:
+    if schema not in _list_adapters:
+        _list_adapters[schema] = TypeAdapter(list[schema])
+    return _list_adapters[schema]
+
+
+def _table_version(table: str) -> int:
+    if table not in _table_versions:
+        _table_versions[table] = 0
+
+        async def on_table_changed(**payload):
+            _table_versions[table] += 1
+
+        subscribe(table, on_table_changed)
+    return _table_versions[table]
 
 
 class BaseDAO:
     model = None
 
+    # ORM-чтения не объединяются single-flight: ORM-объекты изменяемы и
+    # привязаны к сессии. Объединяется Core-путь (find_all_rows /
+    # find_all_as), см. ниже, и поиск отелей (app/hotels/search_cache.py).
     @classmethod
     async def find_by_id(cls, model_id: int):
         async with async_session_maker() as session:
@@ -30,12 +60,56 @@ class BaseDAO:
             result = await session.execute(query)
             return result.scalars().all()
 
+    # Быстрый путь для чтения: Core-запрос по таблице модели. Строки не
+    # превращаются в ORM-объекты (нет identity map, инструментирования
+    # атрибутов и отслеживания изменений) -- для эндпоинтов, которые только
+    # сериализуют результат. Сравнение: python -m app.dao.bench
+    #
+    # Строки неизменяемы, поэтому одинаковые одновременные чтения
+    # объединяются single-flight. В ключе -- версия таблицы: событие об
+    # изменении (оно публикуется после коммита, до ответа на запрос)
+    # меняет ключ, и чтение после своего коммита не присоединяется к
+    # запросу, начатому до него.
+    @classmethod
+    async def find_all_rows(cls, **filter_by):
+        table = cls.model.__table__
+        key = (table.name, _table_version(table.name), tuple(sorted(filter_by.items())))
+        # каждому вызывающему -- свой список, общие только строки
+        return list(await rows_flight.do(key, lambda: cls._select_rows(**filter_by)))
+
+    @classmethod
+    async def _select_rows(cls, **filter_by):
+        async with async_session_maker() as session:
+            query = select(cls.model.__table__).filter_by(**filter_by)
+            result = await session.execute(query)
+            return result.mappings().all()
+
+    @classmethod
+    async def find_all_as(cls, schema, **filter_by):
+        rows = await cls.find_all_rows(**filter_by)
+        return list_adapter(schema).validate_python(rows)
+
+    # Изменения пишут событие в outbox в той же транзакции (см. app/outbox/relay.py).
+    # В событие попадает только первичный ключ: данные могут быть секретными.
     @classmethod
     async def add(cls, **data):
         async with async_session_maker() as session:
-            query = insert(cls.model).values(**data)
+            query = insert(cls.model).values(**data).returning(*cls.model.__table__.primary_key.columns)
+            key = (await session.execute(query)).mappings().one()
+            events = [make_event(cls.model.__tablename__, "insert", **key)]
+            await record(session, events)
+            await session.commit()
+        await dispatch(events)
+
+    @classmethod
+    async def update(cls, model_id: int, **data):
+        async with async_session_maker() as session:
+            query = update(cls.model).filter_by(id=model_id).values(**data)
             await session.execute(query)
+            events = [make_event(cls.model.__tablename__, "update", id=model_id)]
+            await record(session, events)
             await session.commit()
+        await dispatch(events)
 
 # =============================================== `execute`
 """
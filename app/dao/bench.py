@@ -0,0 +1,108 @@
+# Сравнение чтения через ORM и через Core (BaseDAO.find_all_rows / find_all_as)
+# -----------------------------
+# В таблицы bookings и rooms временно добавляется --rows строк (в транзакции,
+# которая в конце откатывается), затем каждый способ чтения прогоняется
+# --rounds раз и печатается скорость в строках в секунду.
+#
+# запуск из корневого каталога:
+# python -m app.dao.bench --rows 20000
+import argparse
+import asyncio
+import gc
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.bookings.dao import BookingDAO
+from app.bookings.models import Bookings
+from app.bookings.partitions import ensure_partitions
+from app.bookings.schemas import SBooking
+from app.database import async_session_maker, engine
+from app.dao.base import list_adapter
+from app.rooms.dao import RoomsDAO
+from app.rooms.models import Rooms
+from app.rooms.schemas import SRoom
+from app.users.models import Users
+
+
+async def _seed(connection, rows: int) -> dict:
+    hotel_id, room_id, user_id = (await connection.execute(
+        select(func.min(Rooms.hotel_id), func.min(Rooms.id), select(func.min(Users.id)).scalar_subquery())
+    )).one()
+    date_from = date.today()
+    await connection.execute(insert(Rooms), [
+        {"hotel_id": hotel_id, "name": f"bench {i}", "description": "bench", "price": 1000,
+         "services": ["Wi-Fi", "Кондиционер"], "quantity": 1, "image_id": 1}
+        for i in range(rows)
+    ])
+    await connection.execute(insert(Bookings), [
+        {"room_id": room_id, "user_id": user_id, "date_from": date_from, "date_to": date_from + timedelta(days=2),
+         "price": 1000, "total_cost": 2000}
+        for _ in range(rows)
+    ])
+    return {"user_id": user_id}
+
+
+async def _rows_per_second(read, rounds: int) -> float:
+    # лучший прогон: паузы сборщика мусора и соседние задачи только
+    # замедляют отдельные прогоны и не должны решать исход сравнения
+    await read()
+    gc.collect()
+    best = 0.0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        rows = len(await read())
+        best = max(best, rows / (time.perf_counter() - started))
+    return best
+
+
+async def _orm_as(dao, adapter, filter_by):
+    return adapter.validate_python(await dao.find_all(**filter_by), from_attributes=True)
+
+
+async def run_bench(rows: int = 20_000, rounds: int = 5, connection=None) -> dict:
+    # connection -- уже открытая транзакция (тесты); иначе создаётся своя и откатывается
+    if connection is None:
+        await ensure_partitions(date.today())
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            async_session_maker.configure(bind=connection, join_transaction_mode="create_savepoint")
+            try:
+                return await run_bench(rows, rounds, connection)
+            finally:
+                async_session_maker.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+                await transaction.rollback()
+
+    filters = await _seed(connection, rows)
+    targets = {
+        "bookings": (BookingDAO, SBooking, {"user_id": filters["user_id"]}),
+        "rooms": (RoomsDAO, SRoom, {}),
+    }
+    results = {}
+    for name, (dao, schema, filter_by) in targets.items():
+        adapter = list_adapter(schema)
+        results[name] = {
+            "orm": await _rows_per_second(lambda: dao.find_all(**filter_by), rounds),
+            "orm + pydantic": await _rows_per_second(lambda: _orm_as(dao, adapter, filter_by), rounds),
+            "core": await _rows_per_second(lambda: dao.find_all_rows(**filter_by), rounds),
+            "core + pydantic": await _rows_per_second(lambda: dao.find_all_as(schema, **filter_by), rounds),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM против Core при чтении bookings и rooms")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_bench(args.rows, args.rounds))
+    print("строк в секунду")
+    for name, timings in results.items():
+        for method, rows_per_second in timings.items():
+            print(f"{name:10} {method:18} {rows_per_second:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,42 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.config import settings
-
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+from app.deadlines import remaining
+from app.logger import install_sql_logging
+
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    # запрос не ждёт свободное соединение бесконечно
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    # верхняя граница для любого запроса, даже вне HTTP-запроса;
+    # долгие служебные операции (импорт, архивирование) снимают её сами
+    connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+)
+
+# вместо echo=True: медленные запросы и выборка остальных, см. app/logger.py
+install_sql_logging(engine)
+
+
+# доля statement_timeout сессии, на которую дедлайн должен быть короче,
+# чтобы ради него стоило отправлять SET LOCAL: при REQUEST_TIMEOUT, равном
+# таймауту сессии, лишний запрос в каждой транзакции ничего не даёт --
+# зависший запрос всё равно отменит DeadlineMiddleware
+DEADLINE_MARGIN = 0.1
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def apply_request_deadline(connection):
+    # внутри HTTP-запроса транзакция не переживает дедлайн запроса
+    timeout = remaining()
+    if timeout is None:
+        return
+    timeout_ms = max(int(timeout * 1000), 1)
+    if timeout_ms < settings.DB_STATEMENT_TIMEOUT_MS * (1 - DEADLINE_MARGIN):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
 
 async_session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
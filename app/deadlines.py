@@ -0,0 +1,116 @@
+# Дедлайн запроса
+# -----------------------------
+# Каждому HTTP-запросу выдаётся бюджет времени REQUEST_TIMEOUT секунд
+# (клиент может сократить его заголовком X-Request-Timeout). Дедлайн
+# хранится в contextvar и доступен коду ниже по стеку через remaining():
+# app/database.py ограничивает им statement_timeout транзакции.
+#
+# По истечении дедлайна или при отключении клиента обработчик запроса
+# отменяется (asyncio cancel), asyncpg при этом отменяет выполняющийся
+# запрос на сервере, и соединение возвращается в пул.
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from starlette.datastructures import Headers
+
+from app.config import settings
+
+TIMEOUT_HEADER = "x-request-timeout"
+# query_canceled: запрос прерван по statement_timeout
+QUERY_CANCELED = "57014"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def request_timeout(headers: Headers) -> float:
+    timeout = settings.REQUEST_TIMEOUT
+    try:
+        requested = float(headers.get(TIMEOUT_HEADER, timeout))
+    except ValueError:
+        return timeout
+    # клиент может только сократить бюджет
+    return min(max(requested, 0.0), timeout)
+
+
+class DeadlineMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout = request_timeout(Headers(scope=scope))
+        token = _deadline.set(time.monotonic() + timeout)
+
+        response_started = False
+        response_complete = False
+        disconnected = False
+        messages = asyncio.Queue()
+
+        async def send_tracked(message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        async def receive_queued():
+            return await messages.get()
+
+        handler = asyncio.create_task(self.app(scope, receive_queued, send_tracked))
+
+        async def watch_disconnect():
+            # receive читается здесь, а обработчику сообщения передаются
+            # через очередь: так отключение клиента видно сразу, даже пока
+            # обработчик ждёт базу и сам receive не вызывает
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        disconnected = True
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            async with asyncio.timeout(timeout):
+                await handler
+        except (TimeoutError, PoolTimeoutError):
+            # PoolTimeoutError -- все соединения пула заняты дольше DB_POOL_TIMEOUT
+            if not response_started:
+                await _send_timeout(send)
+        except DBAPIError as error:
+            if response_started or getattr(error.orig, "sqlstate", None) != QUERY_CANCELED:
+                raise
+            await _send_timeout(send)
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+        finally:
+            watcher.cancel()
+            _deadline.reset(token)
+
+
+async def _send_timeout(send):
+    body = json.dumps({"detail": "Превышено время обработки запроса"}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,33 @@
+# Внутрипроцессные события
+# -----------------------------
+# DAO публикуют события об изменении данных, кэши и фоновые задачи
+# подписываются на них, не импортируя друг друга напрямую.
+#
+# События изменений таблиц приходят из outbox (app/outbox/relay.py), тема -- имя таблицы:
+# subscribe("bookings", callback)
+# await publish("bookings", operation="insert", id=1, room_id=1, date_from="2024-01-01", ...)
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_subscribers = defaultdict(list)
+
+
+def subscribe(topic: str, callback):
+    _subscribers[topic].append(callback)
+
+
+def unsubscribe(topic: str, callback):
+    if callback in _subscribers[topic]:
+        _subscribers[topic].remove(callback)
+
+
+async def publish(topic: str, **payload):
+    # событие уже закоммичено: ошибка одного подписчика не должна
+    # ни мешать остальным, ни превращать успешный запрос в 500
+    for callback in list(_subscribers[topic]):
+        try:
+            await callback(**payload)
+        except Exception:
+            logger.exception("Подписчик события завершился с ошибкой", extra={"topic": topic})
@@ -25,6 +25,45 @@ IncorrectTokenFormatException = HTTPException(
     detail="Неверный формат токена авторизации",
 )
 
+TokenRevokedException = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Токен авторизации отозван",
+)
+
 UserNotPresentException = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
-)
\ No newline at end of file
+)
+
+AdminRequiredException = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="Недостаточно прав",
+)
+RoomCannotBeBookedException = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="Не осталось свободных номеров",
+)
+
+InvalidStayException = HTTPException(
+    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    detail="Некорректный период: дата выезда должна быть позже даты заезда, срок проживания ограничен",
+)
+
+BookingNotFoundException = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail="Бронь не найдена",
+)
+
+UnknownFieldsException = HTTPException(
+    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    detail="Неизвестное поле в параметре fields",
+)
+
+ProfilingAlreadyRunningException = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="Профилирование уже запущено",
+)
+
+ProfileNotReadyException = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail="Профиль ещё не собран",
+)
@@ -0,0 +1,42 @@
+# Выбор полей ответа: ?fields=id,date_from,total_cost
+# -----------------------------
+# Списки сериализуются сразу в JSON через TypeAdapter (pydantic-core),
+# минуя jsonable_encoder, и только с запрошенными полями. Без fields
+# возвращаются все поля схемы.
+#
+# booking_fields = FieldsSelector(SBookingInfo)
+# async def get_bookings(fields: Optional[set[str]] = Depends(booking_fields)):
+#     return booking_fields.response(bookings, fields)
+from typing import Optional
+
+from fastapi import Query, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.exceptions import UnknownFieldsException
+
+
+class FieldsSelector:
+    def __init__(self, schema: type[BaseModel], exclude_none: bool = False):
+        self.schema = schema
+        self.exclude_none = exclude_none
+        self.adapter = TypeAdapter(list[schema])
+
+    def __call__(
+            self,
+            fields: Optional[str] = Query(None, description="Поля ответа через запятую, например id,date_from"),
+    ) -> Optional[set[str]]:
+        if not fields:
+            return None
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        if not selected or not selected <= self.schema.model_fields.keys():
+            raise UnknownFieldsException
+        return selected
+
+    def response(self, items, fields: Optional[set[str]] = None) -> Response:
+        models = self.adapter.validate_python(items, from_attributes=True)
+        content = self.adapter.dump_json(
+            models,
+            include={"__all__": fields} if fields else None,
+            exclude_none=self.exclude_none,
+        )
+        return Response(content=content, media_type="application/json")
@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, func, select
+
+from app.bookings.dao import BookingDAO
+from app.bookings.models import Bookings
+from app.dao.base import BaseDAO
+from app.database import async_session_maker
+from app.hotels.models import Hotels
+from app.rooms.models import Rooms
+
+
+class HotelsDAO(BaseDAO):
+    model = Hotels
+
+    @classmethod
+    async def search(
+            cls,
+            location: str,
+            date_from: date,
+            date_to: date,
+            services: Optional[list[str]] = None,
+            room_services: Optional[list[str]] = None,
+    ):
+        """
+        WITH booked_rooms AS (
+            SELECT room_id, COUNT(room_id) AS rooms_booked FROM bookings
+            WHERE date_from < :date_to AND date_to > :date_from
+                AND date_from > :date_from - BOOKING_MAX_DAYS  -- отсечение партиций
+            GROUP BY room_id
+        ),
+        hotels_rooms_left AS (
+            SELECT rooms.hotel_id, SUM(rooms.quantity - COALESCE(rooms_booked, 0)) AS rooms_left
+            FROM rooms LEFT JOIN booked_rooms ON booked_rooms.room_id = rooms.id
+            WHERE rooms.services @> :room_services
+            GROUP BY rooms.hotel_id
+        )
+        SELECT hotels.*, rooms_left FROM hotels
+        JOIN hotels_rooms_left ON hotels_rooms_left.hotel_id = hotels.id
+        WHERE rooms_left > 0 AND location ILIKE :location AND services @> :services
+        """
+        booked_rooms = (
+            select(Bookings.room_id, func.count(Bookings.room_id).label("rooms_booked"))
+            .where(BookingDAO.overlapping(date_from, date_to))
+            .group_by(Bookings.room_id)
+            .cte("booked_rooms")
+        )
+        hotels_rooms_left = (
+            select(
+                Rooms.hotel_id,
+                func.sum(Rooms.quantity - func.coalesce(booked_rooms.c.rooms_booked, 0)).label("rooms_left"),
+            )
+            .select_from(Rooms)
+            .join(booked_rooms, booked_rooms.c.room_id == Rooms.id, isouter=True)
+            .group_by(Rooms.hotel_id)
+        )
+        if room_services:
+            hotels_rooms_left = hotels_rooms_left.where(Rooms.services.contains(room_services))
+        hotels_rooms_left = hotels_rooms_left.cte("hotels_rooms_left")
+
+        query = (
+            select(Hotels.__table__.columns, hotels_rooms_left.c.rooms_left)
+            .join(hotels_rooms_left, hotels_rooms_left.c.hotel_id == Hotels.id)
+            .where(and_(hotels_rooms_left.c.rooms_left > 0, Hotels.location.ilike(f"%{location}%")))
+        )
+        # JSONB @> -- поиск по GIN-индексу ix_hotels_services
+        if services:
+            query = query.where(Hotels.services.contains(services))
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return result.mappings().all()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 
 
@@ -8,6 +9,10 @@ class Hotels(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     location = Column(String, nullable=False)
-    services = Column(JSON)
+    services = Column(JSONB)
     rooms_quantity = Column(Integer, nullable=False)
     image_id = Column(Integer)
+
+    __table_args__ = (
+        Index('ix_hotels_services', 'services', postgresql_using='gin', postgresql_ops={'services': 'jsonb_path_ops'}),
+    )
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SHotel(BaseModel):
+    id: int
+    name: str
+    location: str
+    services: Optional[list[str]]
+    rooms_quantity: int
+    image_id: Optional[int]
+
+    class Config:
+        from_attributes = True
+
+
+class SHotelInfo(SHotel):
+    rooms_left: int
+    # стоимость самого дешёвого свободного номера за весь период
+    min_total_cost: Optional[int] = None
@@ -0,0 +1,188 @@
+# Предрасчёт и прогрев результатов поиска отелей
+# -----------------------------
+# Результаты HotelsDAO.search хранятся в app.cache под пространством имён
+# SEARCH_NAMESPACE. Ключ -- параметры поиска (местоположение, даты, удобства).
+#
+# Прогрев (warm_up) считает заранее:
+#   - популярные поиски, которые этот процесс уже видел (record_search);
+#   - для каждого местоположения из WARMUP_LOCATIONS -- заезды на ближайшие
+#     WARMUP_DAYS_AHEAD дней с длительностью из WARMUP_STAY_NIGHTS.
+# Прогрев запускается при старте приложения (до приёма первых запросов)
+# и затем каждые WARMUP_INTERVAL секунд (warm_up_periodically).
+#
+# При изменении броней (событие "bookings" из outbox) пересчитываются только
+# закэшированные поиски, чьи даты пересекаются с датами брони; изменения
+# копятся REFRESH_DELAY секунд и пересчитываются одним проходом.
+#
+# Любое изменение броней или номеров увеличивает версию кэша: результат,
+# который начали считать до изменения (поиск, прогрев, пересчёт), в кэш
+# не записывается -- иначе он пережил бы сброс на _entry_ttl() секунд.
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, timedelta
+
+from app.cache import cache
+from app.config import settings
+from app.events import subscribe
+from app.hotels.dao import HotelsDAO
+from app.pricing.dao import PricingDAO
+from app.singleflight import get_flight
+
+logger = logging.getLogger(__name__)
+
+SEARCH_NAMESPACE = "hotels_search"
+REFRESH_DELAY = 0.5
+
+# одинаковые поиски, пришедшие одновременно в холодный кэш, считаются один раз
+search_flight = get_flight(SEARCH_NAMESPACE)
+
+_search_counts = Counter()
+_dirty_periods = []
+_refresh_task = None
+_version = 0
+
+
+def search_key(
+        location: str,
+        date_from: date,
+        date_to: date,
+        services: list[str] = (),
+        room_services: list[str] = (),
+) -> tuple:
+    return (
+        location.strip(),
+        date_from,
+        date_to,
+        tuple(sorted(services or ())),
+        tuple(sorted(room_services or ())),
+    )
+
+
+def _entry_ttl() -> int:
+    # прогретая запись должна дожить до следующего прохода прогрева
+    return max(settings.CACHE_TTL, settings.WARMUP_INTERVAL * 2)
+
+
+async def compute(key: tuple) -> list[dict]:
+    location, date_from, date_to, services, room_services = key
+    version = _version
+    rows = await HotelsDAO.search(
+        location=location,
+        date_from=date_from,
+        date_to=date_to,
+        services=list(services),
+        room_services=list(room_services),
+    )
+    hotels = [dict(row) for row in rows]
+    if hotels:
+        min_costs = await PricingDAO.min_total_costs(
+            [hotel["id"] for hotel in hotels], date_from, date_to, room_services,
+        )
+        for hotel in hotels:
+            hotel["min_total_cost"] = min_costs.get(hotel["id"])
+    if _version == version:
+        cache.set(SEARCH_NAMESPACE, key, hotels, ttl=_entry_ttl())
+    return hotels
+
+
+def record_search(key: tuple):
+    _search_counts[key] += 1
+    # счётчик не должен расти бесконечно: оставляем только самые частые
+    if len(_search_counts) > settings.WARMUP_TOP_SEARCHES * 10:
+        top = _search_counts.most_common(settings.WARMUP_TOP_SEARCHES)
+        _search_counts.clear()
+        _search_counts.update(dict(top))
+
+
+async def search(
+        location: str,
+        date_from: date,
+        date_to: date,
+        services: list[str] = (),
+        room_services: list[str] = (),
+) -> list[dict]:
+    key = search_key(location, date_from, date_to, services, room_services)
+    record_search(key)
+    hotels = cache.get(SEARCH_NAMESPACE, key)
+    if hotels is None:
+        hotels = await search_flight.do(key, lambda: compute(key))
+    return hotels
+
+
+def warmup_keys(today: date = None) -> list[tuple]:
+    today = today or date.today()
+    keys = [
+        key for key, _ in _search_counts.most_common(settings.WARMUP_TOP_SEARCHES)
+        # прошедшие даты больше никто не ищет
+        if key[1] >= today
+    ]
+    for location in settings.WARMUP_LOCATIONS:
+        for days in range(settings.WARMUP_DAYS_AHEAD):
+            date_from = today + timedelta(days=days)
+            for nights in settings.WARMUP_STAY_NIGHTS:
+                keys.append(search_key(location, date_from, date_from + timedelta(days=nights)))
+    return list(dict.fromkeys(keys))
+
+
+async def warm_up(today: date = None) -> int:
+    keys = warmup_keys(today)
+    for key in keys:
+        await compute(key)
+    return len(keys)
+
+
+async def warm_up_periodically():
+    while True:
+        await asyncio.sleep(settings.WARMUP_INTERVAL)
+        try:
+            await warm_up()
+        except Exception:
+            logger.exception("Не удалось прогреть кэш поиска отелей")
+
+
+async def refresh(periods: list[tuple]) -> int:
+    # пересчитываем только поиски, на результат которых влияют брони:
+    # даты поиска пересекаются хотя бы с одним периодом [date_from, date_to)
+    keys = [
+        key for key in cache.keys(SEARCH_NAMESPACE)
+        if any(key[1] < date_to and key[2] > date_from for date_from, date_to in periods)
+    ]
+    for key in keys:
+        await compute(key)
+    return len(keys)
+
+
+async def flush() -> int:
+    periods = _dirty_periods.copy()
+    _dirty_periods.clear()
+    return await refresh(periods) if periods else 0
+
+
+async def _flush_later():
+    global _refresh_task
+    await asyncio.sleep(REFRESH_DELAY)
+    _refresh_task = None
+    try:
+        await flush()
+    except Exception:
+        logger.exception("Не удалось обновить кэш поиска отелей")
+
+
+async def on_bookings_changed(date_from: str, date_to: str, **payload):
+    global _refresh_task, _version
+    _version += 1
+    _dirty_periods.append((date.fromisoformat(date_from), date.fromisoformat(date_to)))
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_flush_later())
+
+
+async def on_rooms_changed(**payload):
+    global _version
+    # цена и количество номеров влияют на все закэшированные поиски
+    _version += 1
+    cache.invalidate(SEARCH_NAMESPACE)
+
+
+subscribe("bookings", on_bookings_changed)
+subscribe("rooms", on_rooms_changed)
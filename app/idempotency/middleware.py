@@ -0,0 +1,146 @@
+# Ключи идемпотентности: заголовок Idempotency-Key
+# -----------------------------
+# Для маршрутов из routes первый запрос с ключом выполняется как обычно,
+# его ответ (статус, content-type, тело) сохраняется на IDEMPOTENCY_TTL
+# секунд. Повтор с тем же ключом получает сохранённый ответ с заголовком
+# Idempotent-Replayed: true, обработчик (проверка свободных номеров,
+# bcrypt) не выполняется. Ключ действует в пределах метода, пути и
+# вызывающего: пользователя (sub из access-токена), а для запросов без
+# токена (регистрация) -- адреса клиента. Запрос с просроченным или
+# поддельным токеном выполняется без ключа: его ответ (401) не должен
+# попасть ни в чью область.
+#
+# - повтор, пока первый запрос ещё выполняется -- 409;
+# - тот же ключ с другим телом запроса -- 422;
+# - ответы 5xx и прерванные запросы не сохраняются, ключ освобождается.
+import hashlib
+import json
+
+from jose import JWTError
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.idempotency.store import StoredResponse, idempotency_store
+from app.users.auth import decode_token
+from app.users.dependencies import ACCESS_TOKEN_COOKIE
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+def _caller(scope, headers: Headers):
+    # None -- токен есть, но недействителен
+    cookies = headers.get("cookie", "")
+    for cookie in cookies.split(";"):
+        name, _, value = cookie.strip().partition("=")
+        if name == ACCESS_TOKEN_COOKIE:
+            try:
+                user_id = decode_token(value).get("sub")
+            except JWTError:
+                return None
+            return f"user:{user_id}" if user_id is not None else None
+    client = scope.get("client")
+    return f"client:{client[0] if client else ''}"
+
+
+async def _send_json(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, routes: set[tuple[str, str]], store=None):
+        self.app = app
+        self.routes = routes
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        client_key = headers.get(IDEMPOTENCY_HEADER)
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key должен быть от 1 до {MAX_KEY_LENGTH} символов")
+            return
+        caller = _caller(scope, headers)
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+
+        # тело запроса читается целиком: по нему проверяется, что повтор
+        # пришёл с теми же данными
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        scope_key = "\n".join([client_key, scope["method"], scope["path"], caller])
+        key = hashlib.sha256(scope_key.encode()).hexdigest()
+        request_hash = hashlib.sha256(body).hexdigest()
+        ttl = settings.IDEMPOTENCY_TTL
+
+        stored = await self.store.begin(key, request_hash, ttl)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                await _send_json(send, 422, "Idempotency-Key уже использован с другим телом запроса")
+            elif stored.status_code is None:
+                await _send_json(send, 409, "Запрос с этим Idempotency-Key ещё выполняется")
+            else:
+                await self._replay(send, stored)
+            return
+
+        body_sent = False
+
+        async def receive_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = StoredResponse(request_hash)
+        chunks = []
+        complete = False
+
+        async def send_recorded(message):
+            nonlocal complete
+            if message["type"] == "http.response.start":
+                response.status_code = message["status"]
+                response.content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_recorded)
+        finally:
+            if complete and response.status_code < 500:
+                response.body = b"".join(chunks)
+                await self.store.complete(key, response, ttl)
+            else:
+                await self.store.release(key)
+
+    @staticmethod
+    async def _replay(send, stored: StoredResponse):
+        headers = [
+            (b"content-length", str(len(stored.body or b"")).encode()),
+            (b"idempotent-replayed", b"true"),
+        ]
+        if stored.content_type:
+            headers.append((b"content-type", stored.content_type.encode()))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body or b""})
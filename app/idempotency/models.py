@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Index, LargeBinary, SmallInteger, String
+from app.database import Base
+
+
+class IdempotencyKeys(Base):
+    __tablename__ = 'idempotency_keys'
+
+    # sha256 от ключа клиента, метода, пути и пользователя
+    key = Column(String(64), primary_key=True)
+    # sha256 тела запроса: повтор ключа с другим телом -- ошибка клиента
+    request_hash = Column(String(64), nullable=False)
+    # NULL -- первый запрос ещё выполняется
+    status_code = Column(SmallInteger, nullable=True)
+    content_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
@@ -0,0 +1,135 @@
+# Хранилища ответов для ключей идемпотентности
+# -----------------------------
+# DatabaseIdempotencyStore -- таблица idempotency_keys, RedisIdempotencyStore --
+# Redis (общий для всех воркеров, записи удаляет сам Redis по TTL).
+# Выбирается по REDIS_URL, как и хранилище отозванных токенов.
+#
+# begin() атомарно занимает ключ: возвращает None, если запрос нужно
+# выполнить, или уже сохранённую запись (status_code is None -- первый
+# запрос с этим ключом ещё выполняется).
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.database import async_session_maker
+from app.idempotency.models import IdempotencyKeys
+from app.redis_client import RedisClient
+
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    body: Optional[bytes] = None
+
+
+class DatabaseIdempotencyStore:
+    async def begin(self, key: str, request_hash: str, ttl: int) -> Optional[StoredResponse]:
+        now = datetime.now(timezone.utc)
+        values = {"key": key, "request_hash": request_hash, "expires_at": now + timedelta(seconds=ttl)}
+        query = (
+            insert(IdempotencyKeys)
+            .values(**values)
+            # просроченная запись занимается заново
+            .on_conflict_do_update(
+                index_elements=[IdempotencyKeys.key],
+                set_={**values, "status_code": None, "content_type": None, "body": None},
+                where=IdempotencyKeys.expires_at < now,
+            )
+            .returning(IdempotencyKeys.key)
+        )
+        async with async_session_maker() as session:
+            acquired = (await session.execute(query)).scalar_one_or_none()
+            await session.commit()
+            if acquired is not None:
+                return None
+            stored = (await session.execute(
+                select(
+                    IdempotencyKeys.request_hash,
+                    IdempotencyKeys.status_code,
+                    IdempotencyKeys.content_type,
+                    IdempotencyKeys.body,
+                ).where(IdempotencyKeys.key == key)
+            )).one()
+        return StoredResponse(*stored)
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int):
+        query = (
+            update(IdempotencyKeys)
+            .where(IdempotencyKeys.key == key)
+            .values(
+                status_code=response.status_code,
+                content_type=response.content_type,
+                body=response.body,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            )
+        )
+        async with async_session_maker() as session:
+            await session.execute(query)
+            await session.commit()
+
+    async def release(self, key: str):
+        async with async_session_maker() as session:
+            await session.execute(delete(IdempotencyKeys).where(IdempotencyKeys.key == key))
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        query = delete(IdempotencyKeys).where(IdempotencyKeys.expires_at < datetime.now(timezone.utc))
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            await session.commit()
+        return result.rowcount
+
+
+class RedisIdempotencyStore:
+    key_prefix = "idempotency:"
+
+    def __init__(self, url: str):
+        self.redis = RedisClient(url)
+
+    @staticmethod
+    def _encode(response: StoredResponse) -> bytes:
+        # компактный формат: hash \n status \n content-type \n тело
+        status = str(response.status_code or "")
+        header = f"{response.request_hash}\n{status}\n{response.content_type or ''}\n"
+        return header.encode() + (response.body or b"")
+
+    @staticmethod
+    def _decode(value: bytes) -> StoredResponse:
+        request_hash, status, content_type, body = value.split(b"\n", 3)
+        return StoredResponse(
+            request_hash=request_hash.decode(),
+            status_code=int(status) if status else None,
+            content_type=content_type.decode() or None,
+            body=body if status else None,
+        )
+
+    async def begin(self, key: str, request_hash: str, ttl: int) -> Optional[StoredResponse]:
+        value = self._encode(StoredResponse(request_hash))
+        acquired = await self.redis.execute("SET", self.key_prefix + key, value, "NX", "EX", str(ttl))
+        if acquired == "OK":
+            return None
+        stored = await self.redis.execute("GET", self.key_prefix + key)
+        if stored is None:
+            # запись истекла между SET и GET
+            return await self.begin(key, request_hash, ttl)
+        return self._decode(stored)
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int):
+        await self.redis.execute("SET", self.key_prefix + key, self._encode(response), "EX", str(ttl))
+
+    async def release(self, key: str):
+        await self.redis.execute("DEL", self.key_prefix + key)
+
+    async def purge_expired(self) -> int:
+        return 0
+
+
+idempotency_store = (
+    RedisIdempotencyStore(settings.REDIS_URL) if settings.REDIS_URL else DatabaseIdempotencyStore()
+)
@@ -0,0 +1,29 @@
+# запуск из корневого каталога:
+# python -m app.importer hotels data/hotels.csv
+# python -m app.importer rooms data/rooms.jsonl --chunk-size 50000
+import argparse
+import asyncio
+import time
+
+from app.importer.loader import CHUNK_SIZE, TARGETS, import_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт отелей и номеров из CSV / JSON / JSON Lines")
+    parser.add_argument('target', choices=sorted(TARGETS))
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stats = asyncio.run(import_file(args.target, args.path, args.chunk_size))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.target}: read={stats['read']} invalid={stats['invalid']} "
+        f"staged={stats['staged']} merged={stats['merged']} "
+        f"({elapsed:.1f} s, {stats['read'] / max(elapsed, 1e-9):.0f} rows/s)"
+    )
+
+
+if __name__ == '__main__':
+    main()
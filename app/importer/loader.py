@@ -0,0 +1,193 @@
+# Потоковая загрузка отелей и номеров из CSV / JSON / JSON Lines
+# -----------------------------
+# Файл читается по частям (chunk), каждая часть валидируется pydantic и
+# отправляется через asyncpg COPY во временную staging-таблицу. В конце
+# одним запросом staging сливается в основную таблицу. В памяти
+# одновременно находится только одна часть файла. Событие об импорте пишется
+# в outbox той же транзакцией, что и слияние, -- кэши поиска и доступности
+# сбрасываются во всех воркерах.
+import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import text
+
+from app.database import engine
+from app.importer.schemas import SHotelImport, SRoomImport
+from app.outbox.relay import dispatch, make_event, record
+
+CHUNK_SIZE = 10_000
+READ_BUFFER_SIZE = 1 << 16
+
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+
+
+class ImportTarget:
+    def __init__(self, table: str, schema, columns: tuple, parent: tuple = None):
+        self.table = table
+        self.schema = schema
+        self.adapter = TypeAdapter(list[schema])
+        self.columns = columns
+        # (колонка, таблица) -- строки без существующего родителя пропускаются
+        self.parent = parent
+
+    @property
+    def staging(self) -> str:
+        return f"{self.table}_staging"
+
+    def create_staging_sql(self) -> str:
+        return (
+            f"CREATE TEMP TABLE {self.staging} ON COMMIT DROP AS "
+            f"SELECT {', '.join(self.columns)} FROM {self.table} WITH NO DATA"
+        )
+
+    def to_record(self, item) -> tuple:
+        return tuple(
+            json.dumps(item.services, ensure_ascii=False) if column == 'services' else getattr(item, column)
+            for column in self.columns
+        )
+
+    def merge_sql(self) -> list[str]:
+        columns = ', '.join(self.columns)
+        source = f"{self.staging} s"
+        if self.parent:
+            parent_column, parent_table = self.parent
+            source += f" JOIN {parent_table} p ON p.id = s.{parent_column}"
+        selected = ', '.join(f"s.{column}" for column in self.columns)
+        without_id = [column for column in self.columns if column != 'id']
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in without_id)
+        return [
+            # строки с явным id: upsert, при повторе id в файле побеждает последняя
+            f"INSERT INTO {self.table} ({columns}) "
+            f"SELECT DISTINCT ON (s.id) {selected} FROM {source} "
+            f"WHERE s.id IS NOT NULL ORDER BY s.id, s.seq DESC "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            # последовательность -- за явными id, иначе nextval ниже
+            # может выдать только что вставленный id
+            self.sync_sequence_sql(),
+            # строки без id получают его из последовательности
+            f"INSERT INTO {self.table} ({', '.join(without_id)}) "
+            f"SELECT {', '.join(f's.{column}' for column in without_id)} FROM {source} "
+            f"WHERE s.id IS NULL",
+        ]
+
+    def sync_sequence_sql(self) -> str:
+        return (
+            f"SELECT setval(pg_get_serial_sequence('{self.table}', 'id'), "
+            f"COALESCE((SELECT max(id) FROM {self.table}), 1))"
+        )
+
+
+TARGETS = {
+    'hotels': ImportTarget(
+        table='hotels',
+        schema=SHotelImport,
+        columns=('id', 'name', 'location', 'services', 'rooms_quantity', 'image_id'),
+    ),
+    'rooms': ImportTarget(
+        table='rooms',
+        schema=SRoomImport,
+        columns=('id', 'hotel_id', 'name', 'description', 'price', 'services', 'quantity', 'image_id'),
+        parent=('hotel_id', 'hotels'),
+    ),
+}
+
+
+def _iter_json_array(file):
+    # JSON-массив читается буфером фиксированного размера, объекты
+    # разбираются по одному через raw_decode
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_BUFFER_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("Ожидался JSON-массив объектов")
+    pos = 1
+    while True:
+        pos = _JSON_SEPARATORS.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            obj, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_BUFFER_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+
+
+def read_records(path):
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with path.open(encoding='utf-8', newline='') as file:
+        if suffix == '.csv':
+            yield from csv.DictReader(file)
+        elif suffix in ('.jsonl', '.ndjson'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == '.json':
+            yield from _iter_json_array(file)
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {suffix}")
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def validate_chunk(target: ImportTarget, rows: list) -> tuple[list, int]:
+    # быстрый путь -- весь chunk одним вызовом; при ошибке построчно,
+    # чтобы не терять валидные строки
+    try:
+        return target.adapter.validate_python(rows), 0
+    except ValidationError:
+        items = []
+        for row in rows:
+            try:
+                items.append(target.schema.model_validate(row))
+            except ValidationError:
+                pass
+        return items, len(rows) - len(items)
+
+
+async def import_file(target_name: str, path, chunk_size: int = CHUNK_SIZE) -> dict:
+    target = TARGETS[target_name]
+    stats = {'read': 0, 'invalid': 0, 'staged': 0, 'merged': 0}
+    async with engine.begin() as conn:
+        # первый execute через SQLAlchemy открывает транзакцию,
+        # COPY через драйвер выполняется уже внутри неё
+        await conn.execute(text("SET LOCAL statement_timeout = 0"))
+        await conn.execute(text(target.create_staging_sql()))
+        await conn.execute(text(f"ALTER TABLE {target.staging} ADD COLUMN seq bigserial"))
+        raw_connection = await conn.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        for rows in chunked(read_records(path), chunk_size):
+            items, invalid = validate_chunk(target, rows)
+            stats['read'] += len(rows)
+            stats['invalid'] += invalid
+            if not items:
+                continue
+            await driver_connection.copy_records_to_table(
+                target.staging,
+                records=[target.to_record(item) for item in items],
+                columns=target.columns,
+            )
+            stats['staged'] += len(items)
+
+        for statement in target.merge_sql():
+            result = await conn.execute(text(statement))
+            if result.returns_rows:
+                continue
+            stats['merged'] += result.rowcount
+        events = [make_event(target.table, "import", merged=stats['merged'])] if stats['merged'] else []
+        await record(conn, events)
+    await dispatch(events)
+    return stats
@@ -0,0 +1,44 @@
+import json
+from typing import Optional
+
+from pydantic import BaseModel, field_validator
+
+
+class SImportBase(BaseModel):
+    id: Optional[int] = None
+    services: list[str] = []
+    image_id: Optional[int] = None
+
+    # в CSV список услуг приходит строкой: '["Wi-Fi", "Парковка"]'
+    @field_validator('services', mode='before')
+    @classmethod
+    def parse_services(cls, value):
+        if value is None or value == '':
+            return []
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    @field_validator('id', 'image_id', mode='before')
+    @classmethod
+    def empty_to_none(cls, value):
+        return None if value == '' else value
+
+
+class SHotelImport(SImportBase):
+    name: str
+    location: str
+    rooms_quantity: int
+
+
+class SRoomImport(SImportBase):
+    hotel_id: int
+    name: str
+    description: Optional[str] = None
+    price: int
+    quantity: int
+
+    @field_validator('description', mode='before')
+    @classmethod
+    def empty_description(cls, value):
+        return None if value == '' else value
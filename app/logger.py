@@ -0,0 +1,184 @@
+# Логирование
+# -----------------------------
+# Логи пишутся в stdout одной JSON-строкой на запись. Запись из обработчика
+# запроса только кладётся в очередь (QueueHandler), форматирование и вывод
+# выполняет отдельный поток (QueueListener), поэтому медленный stdout не
+# задерживает event loop.
+#
+# Каждая запись внутри HTTP-запроса получает request_id (из заголовка
+# X-Request-ID или сгенерированный), он же возвращается в ответе.
+# По завершении запроса пишется запись "request" со статусом, временем
+# и числом / суммарным временем SQL-запросов.
+#
+# SQL логируется выборочно вместо echo=True: запросы дольше SLOW_QUERY_MS --
+# всегда (WARNING), остальные -- с вероятностью SQL_LOG_SAMPLE_RATE (DEBUG).
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+REQUEST_ID_HEADER = "x-request-id"
+# стандартные атрибуты LogRecord, всё остальное из extra попадает в JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# [число SQL-запросов, суммарное время в мс] текущего HTTP-запроса
+sql_stats_var: ContextVar[Optional[list]] = ContextVar("sql_stats", default=None)
+
+logger = logging.getLogger("app")
+sql_logger = logging.getLogger("app.sql")
+request_logger = logging.getLogger("app.request")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    # фильтр QueueHandler выполняется в вызывающем коде до постановки
+    # в очередь, пока contextvar текущего запроса ещё доступен
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class AsyncQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # в отличие от QueueHandler.prepare, не склеиваем traceback с
+        # сообщением: JsonFormatter выводит их отдельными полями
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging():
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = AsyncQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def install_sql_logging(engine):
+    # время старта хранится в контексте выполнения запроса: он живёт ровно
+    # один запрос, и при ошибке ничего не остаётся на соединении из пула
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - context._query_started) * 1000
+        stats = sql_stats_var.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += duration_ms
+        if duration_ms >= settings.SLOW_QUERY_MS:
+            sql_logger.warning("slow query", extra={"statement": statement, "duration_ms": round(duration_ms, 2)})
+        elif sql_logger.isEnabledFor(logging.DEBUG) and random.random() < settings.SQL_LOG_SAMPLE_RATE:
+            sql_logger.debug("query", extra={"statement": statement, "duration_ms": round(duration_ms, 2)})
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        started = getattr(exception_context.execution_context, "_query_started", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        stats = sql_stats_var.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += duration_ms
+        sql_logger.warning("query failed", extra={
+            "statement": exception_context.statement,
+            "duration_ms": round(duration_ms, 2),
+            "error": type(exception_context.original_exception).__name__,
+        })
+
+
+class RequestLoggingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+        sql_stats = [0, 0.0]
+        sql_stats_token = sql_stats_var.set(sql_stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_logger.info("request", extra={
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "sql_count": sql_stats[0],
+                "sql_ms": round(sql_stats[1], 2),
+            })
+            sql_stats_var.reset(sql_stats_token)
+            request_id_var.reset(request_id_token)
@@ -1,15 +1,71 @@
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from datetime import date
-from pydantic import BaseModel
+from app import singleflight
+from app.bookings.partitions import ensure_partitions_ahead
 from app.bookings.router import router as router_bookings
+from app.bookings.schemas import is_valid_stay
+from app.compression import CompressionMiddleware
+from app.config import settings
+from app.deadlines import DeadlineMiddleware
+from app.exceptions import InvalidStayException
+from app.hotels import search_cache
+from app.hotels.schemas import SHotelInfo
+from app.idempotency.middleware import IdempotencyMiddleware
+from app.idempotency.store import idempotency_store
+from app.logger import RequestLoggingMiddleware, setup_logging, stop_logging
+from app.outbox.relay import OutboxRelay
+from app.profiling.loop_monitor import LoopStallMonitor
+from app.profiling.router import router as router_profiling
+from app.rooms.router import router as router_rooms
+from app.users.dependencies import get_current_admin_user
+from app.users.hashing import calibrate_password_policy
 from app.users.router import router as router_users
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    await ensure_partitions_ahead()
+    await run_in_threadpool(calibrate_password_policy)
+    await idempotency_store.purge_expired()
+    # первые запросы после деплоя не должны попадать в холодный кэш
+    await search_cache.warm_up()
+    warmup_task = asyncio.create_task(search_cache.warm_up_periodically())
+    # изменения, сделанные другими воркерами, -> локальные кэши
+    outbox_relay = OutboxRelay()
+    outbox_relay.start()
+    loop_monitor = None
+    if settings.LOOP_STALL_THRESHOLD_MS:
+        loop_monitor = LoopStallMonitor(settings.LOOP_STALL_THRESHOLD_MS / 1000)
+        loop_monitor.start()
+    yield
+    if loop_monitor is not None:
+        loop_monitor.stop()
+    warmup_task.cancel()
+    await outbox_relay.stop()
+    stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(
+    IdempotencyMiddleware,
+    routes={("POST", "/bookings"), ("POST", "/bookings/batch"), ("POST", "/auth/register")},
+)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+app.add_middleware(RequestLoggingMiddleware)
 
 app.include_router(router_users)
 app.include_router(router_bookings)
+app.include_router(router_profiling)
+app.include_router(router_rooms)
+
+SPA_SERVICE = "Спа"
 
 
 class HotelsSearchArgs:
@@ -20,30 +76,40 @@ class HotelsSearchArgs:
             date_to: date,
             has_spa: Optional[bool] = None,
             stars: Optional[int] = Query(None, ge=1, le=5),
+            services: Optional[list[str]] = Query(None),
+            room_services: Optional[list[str]] = Query(None),
     ):
         self.location = location
         self.date_from = date_from
         self.date_to = date_to
         self.has_spa = has_spa
         self.stars = stars
+        self.services = list(services or [])
+        self.room_services = list(room_services or [])
+        if not is_valid_stay(date_from, date_to):
+            raise InvalidStayException
+        if has_spa and SPA_SERVICE not in self.services:
+            self.services.append(SPA_SERVICE)
 
 
 @app.get("/hotels")
-def get_hotels(
+async def get_hotels(
         search_args: HotelsSearchArgs = Depends(),
-):
-    return search_args
-
+) -> list[SHotelInfo]:
+    return await search_cache.search(
+        location=search_args.location,
+        date_from=search_args.date_from,
+        date_to=search_args.date_to,
+        services=search_args.services,
+        room_services=search_args.room_services,
+    )
 
-class SBooking(BaseModel):
-    room_id: int
-    date_from: date
-    date_to: date
 
+@app.get("/metrics/singleflight", dependencies=[Depends(get_current_admin_user)])
+async def get_singleflight_metrics() -> list[dict]:
+    # hit_rate -- доля вызовов, которые дождались уже выполнявшегося запроса
+    return singleflight.stats()
 
-@app.post("/bookings")
-def add_booking(booking: SBooking):
-    pass
 
 # if __name__ == "__main__":
 #     uvicorn.run("main:app", reload=True)
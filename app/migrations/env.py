@@ -50,6 +50,9 @@ from app.hotels.models import Hotels
 from app.bookings.models import *
 from app.rooms.models import *
 from app.users.models import *
+from app.pricing.models import *
+from app.idempotency.models import *
+from app.outbox.models import *
 
 
 # this is the Alembic Config object, which provides
@@ -83,7 +86,8 @@ config.set_main_option("sqlalchemy.url", f"{settings.DATABASE_URL}?async_fallbac
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # логгеры app.* уже созданы при импорте app.database выше
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -116,6 +120,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -136,8 +141,17 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # DDL, ждущий блокировку, задерживает все запросы к таблице за ним:
+        # лучше упасть и перезапустить миграцию, чем остановить бронирования.
+        # Долгие операции (app/migrations/online.py) не ограничены по времени.
+        connection.exec_driver_sql(f"SET lock_timeout = {settings.MIGRATION_LOCK_TIMEOUT_MS}")
+        connection.exec_driver_sql("SET statement_timeout = 0")
+        connection.commit()
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            # autocommit_block в одной миграции не коммитит остальные
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,196 @@
+# Изменения схемы под нагрузкой
+# -----------------------------
+# Обычные op.create_index / op.alter_column / op.create_foreign_key берут
+# блокировку ACCESS EXCLUSIVE (или SHARE) на всё время операции, и
+# бронирования ждут, пока строится индекс или проверяется вся таблица.
+# Здесь собраны замены, которые держат тяжёлую блокировку мгновенно или
+# не берут её вовсе:
+#
+#   create_index_concurrently -- CREATE INDEX CONCURRENTLY; для
+#       партиционированных таблиц (bookings) -- индекс на каждой партиции
+#       по отдельности и ATTACH к индексу родителя
+#   drop_index_concurrently
+#   add_constraint_not_valid + validate_constraint -- ограничение сразу
+#       действует для новых строк, а старые проверяются под SHARE UPDATE
+#       EXCLUSIVE, которая не мешает чтению и записи
+#   set_not_null -- NOT NULL через проверенный CHECK, без полного скана
+#       под ACCESS EXCLUSIVE
+#   backfill -- UPDATE пачками по диапазонам первичного ключа, каждая пачка
+#       в своей транзакции, с паузой между пачками и логом прогресса
+#
+# Операции CONCURRENTLY и пачки нельзя выполнять внутри транзакции миграции,
+# поэтому они идут в op.get_context().autocommit_block(): всё, что было
+# сделано в миграции до них, к этому моменту уже закоммичено. env.py
+# запускает каждую миграцию в отдельной транзакции и ограничивает ожидание
+# блокировок (MIGRATION_LOCK_TIMEOUT_MS): DDL, вставший в очередь за долгой
+# транзакцией, иначе блокировал бы всех, кто пришёл после него.
+#
+# пример миграции:
+# from app.migrations import online
+#
+# def upgrade():
+#     op.add_column('bookings', sa.Column('guests', sa.Integer()))
+#     online.backfill('bookings', "guests = 1", where="guests IS NULL")
+#     online.set_not_null('bookings', 'guests')
+#     online.create_index_concurrently('ix_bookings_guests', 'bookings', ['guests'])
+import logging
+import time
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.config import settings
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _scalar(sql: str, **params):
+    return op.get_bind().execute(sa.text(sql), params).scalar()
+
+
+def _partitions(table: str) -> list[str]:
+    return list(op.get_bind().execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:table AS regclass) "
+        "ORDER BY 1"
+    ), {"table": table}).scalars())
+
+
+def _is_partitioned(table: str) -> bool:
+    return bool(_scalar("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)", table=table))
+
+
+def _drop_invalid_index(name: str):
+    # прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+    # который замедляет запись и мешает повторному запуску
+    if _scalar(
+        "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)", name=name,
+    ):
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _create_index_sql(
+        name: str,
+        table: str,
+        columns: list[str],
+        unique: bool = False,
+        include: list[str] = None,
+        where: str = None,
+        concurrently: bool = False,
+        only: bool = False,
+) -> str:
+    return "".join([
+        "CREATE UNIQUE INDEX" if unique else "CREATE INDEX",
+        " CONCURRENTLY" if concurrently else "",
+        f" IF NOT EXISTS {name} ON ",
+        "ONLY " if only else "",
+        f"{table} ({', '.join(columns)})",
+        f" INCLUDE ({', '.join(include)})" if include else "",
+        f" WHERE {where}" if where else "",
+    ])
+
+
+def create_index_concurrently(
+        name: str,
+        table: str,
+        columns: list[str],
+        unique: bool = False,
+        include: list[str] = None,
+        where: str = None,
+):
+    options = {"unique": unique, "include": include, "where": where}
+    # в офлайн-режиме (--sql) тип таблицы неизвестен: для партиционированной
+    # таблицы полученный скрипт нужно поправить вручную
+    with op.get_context().autocommit_block():
+        if op.get_context().as_sql or not _is_partitioned(table):
+            if not op.get_context().as_sql:
+                _drop_invalid_index(name)
+            op.execute(_create_index_sql(name, table, columns, concurrently=True, **options))
+            return
+        # у партиционированной таблицы CONCURRENTLY не поддерживается:
+        # индекс ON ONLY на родителе создаётся мгновенно (невалидным) и
+        # становится валидным, когда к нему присоединены индексы всех партиций.
+        # Новые партиции получают индекс автоматически.
+        op.execute(_create_index_sql(name, table, columns, only=True, **options))
+        for partition in _partitions(table):
+            partition_index = f"{partition}_{name.removeprefix('ix_').removeprefix(table + '_')}"[:63]
+            _drop_invalid_index(partition_index)
+            op.execute(_create_index_sql(partition_index, partition, columns, concurrently=True, **options))
+            if not _scalar(
+                "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:index)", index=partition_index,
+            ):
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def drop_index_concurrently(name: str, table: str):
+    with op.get_context().autocommit_block():
+        if op.get_context().as_sql or not _is_partitioned(table):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        else:
+            # индекс партиционированной таблицы удаляется только целиком
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def add_constraint_not_valid(table: str, name: str, definition: str):
+    """
+    definition -- тело ограничения, например "CHECK (total_cost >= 0)" или
+    "FOREIGN KEY (room_id) REFERENCES rooms (id)". Проверяются только новые
+    и изменённые строки, блокировка берётся на мгновение.
+    """
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition} NOT VALID")
+
+
+def validate_constraint(table: str, name: str):
+    # в своей транзакции: долгий скан не держит блокировки остальной миграции
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def set_not_null(table: str, column: str):
+    # SET NOT NULL не сканирует таблицу, если есть проверенный CHECK (column IS NOT NULL)
+    check = f"ck_{table}_{column}_not_null"[:63]
+    add_constraint_not_valid(table, check, f"CHECK ({column} IS NOT NULL)")
+    validate_constraint(table, check)
+    op.alter_column(table, column, nullable=False)
+    op.drop_constraint(check, table)
+
+
+def backfill(
+        table: str,
+        assignments: str,
+        where: str = None,
+        key: str = "id",
+        batch_size: int = None,
+        pause: float = None,
+):
+    """
+    UPDATE table SET assignments [WHERE where] пачками по batch_size значений
+    key (целочисленный, с индексом). Каждая пачка коммитится сразу, поэтому
+    строки блокируются ненадолго, а прерванный backfill можно запустить
+    заново, если where отсекает уже обработанные строки.
+    """
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH
+    pause = settings.MIGRATION_BACKFILL_PAUSE if pause is None else pause
+    condition = f" AND ({where})" if where else ""
+    if op.get_context().as_sql:
+        # офлайн-режим: пачки зависят от данных, выводим одним запросом
+        op.execute(f"UPDATE {table} SET {assignments} WHERE TRUE{condition}")
+        return
+    with op.get_context().autocommit_block():
+        first, last = op.get_bind().execute(sa.text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+        if first is None:
+            return
+        update = sa.text(
+            f"UPDATE {table} SET {assignments} WHERE {key} >= :low AND {key} < :high{condition}"
+        )
+        started = time.monotonic()
+        updated = 0
+        for low in range(first, last + 1, batch_size):
+            updated += op.get_bind().execute(update, {"low": low, "high": low + batch_size}).rowcount
+            done = min(low + batch_size - first, last - first + 1)
+            logger.info(
+                "backfill %s: %.1f%% (%s строк, %.0f с)",
+                table, done * 100 / (last - first + 1), updated, time.monotonic() - started,
+            )
+            # пауза даёт репликам и autovacuum догнать запись
+            if pause and low + batch_size <= last:
+                time.sleep(pause)
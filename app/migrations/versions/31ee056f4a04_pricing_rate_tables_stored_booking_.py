@@ -0,0 +1,56 @@
+"""Pricing rate tables, stored booking total_cost
+
+Revision ID: 31ee056f4a04
+Revises: c5acfdfe1aab
+Create Date: 2026-10-19 13:37:28.876840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '31ee056f4a04'
+down_revision: Union[str, None] = 'c5acfdfe1aab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('seasonal_rates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=True),
+    sa.Column('date_from', sa.Date(), nullable=False),
+    sa.Column('date_to', sa.Date(), nullable=False),
+    sa.Column('rate_percent', sa.Integer(), nullable=False),
+    sa.CheckConstraint('date_to > date_from', name='ck_seasonal_rates_period'),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotels.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('weekday_rates',
+    sa.Column('weekday', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('rate_percent', sa.Integer(), nullable=False),
+    sa.CheckConstraint('weekday BETWEEN 0 AND 6', name='ck_weekday_rates_weekday'),
+    sa.PrimaryKeyConstraint('weekday')
+    )
+    op.create_table('occupancy_rates',
+    sa.Column('min_occupancy_percent', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('rate_percent', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('min_occupancy_percent')
+    )
+    # стоимость брони считает движок цен, а не формула (date_to - date_from) * price;
+    # уже посчитанные значения остаются в столбце
+    op.execute("ALTER TABLE bookings ALTER COLUMN total_cost DROP EXPRESSION")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_user_id_date_from', table_name='bookings')
+    op.drop_column('bookings', 'total_cost')
+    op.add_column('bookings', sa.Column('total_cost', sa.Integer(), sa.Computed('(date_to - date_from) * price')))
+    op.create_index('ix_bookings_user_id_date_from', 'bookings', ['user_id', 'date_from'],
+                    postgresql_include=['id', 'room_id', 'date_to', 'price', 'total_cost', 'total_days'])
+    op.drop_table('occupancy_rates')
+    op.drop_table('weekday_rates')
+    op.drop_table('seasonal_rates')
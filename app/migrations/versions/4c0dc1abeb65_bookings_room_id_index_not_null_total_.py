@@ -0,0 +1,35 @@
+"""Bookings room_id index, NOT NULL total_cost
+
+Revision ID: 4c0dc1abeb65
+Revises: 61090eb1d98b
+Create Date: 2026-10-19 13:49:40.573030
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c0dc1abeb65'
+down_revision: Union[str, None] = '61090eb1d98b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # выполняется под нагрузкой: без ACCESS EXCLUSIVE на время скана bookings
+    online.create_index_concurrently(
+        'ix_bookings_room_id_date_from', 'bookings', ['room_id', 'date_from'], include=['date_to'],
+    )
+    # старые брони без стоимости (до движка цен) -- по базовой цене
+    online.backfill('bookings', "total_cost = price * (date_to - date_from)", where="total_cost IS NULL")
+    online.set_not_null('bookings', 'total_cost')
+
+
+def downgrade() -> None:
+    op.alter_column('bookings', 'total_cost', nullable=True)
+    online.drop_index_concurrently('ix_bookings_room_id_date_from', 'bookings')
@@ -0,0 +1,93 @@
+"""Partition bookings by date_from
+
+Revision ID: 96c3149df5e1
+Revises: b3f34b835def
+Create Date: 2026-10-19 13:14:11.502370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '96c3149df5e1'
+down_revision: Union[str, None] = 'b3f34b835def'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COPY_COLUMNS = 'id, room_id, user_id, date_from, date_to, price'
+
+
+def upgrade() -> None:
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    op.rename_table('bookings', 'bookings_old')
+    op.execute("ALTER TABLE bookings_old RENAME CONSTRAINT bookings_pkey TO bookings_old_pkey")
+
+    op.create_table('bookings',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('bookings_id_seq')"), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date_from', sa.Date(), nullable=False),
+    sa.Column('date_to', sa.Date(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Integer(), sa.Computed('(date_to - date_from) * price', ), nullable=True),
+    sa.Column('total_days', sa.Integer(), sa.Computed('date_to - date_from', ), nullable=True),
+    sa.CheckConstraint('date_to > date_from AND date_to - date_from <= 90', name='ck_bookings_stay'),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'date_from'),
+    postgresql_partition_by='RANGE (date_from)'
+    )
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+
+    # помесячные партиции: от самой ранней брони до года вперёд
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', LEAST((SELECT min(date_from) FROM bookings_old), current_date)),
+                    date_trunc('month', current_date) + interval '12 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF bookings FOR VALUES FROM (%L) TO (%L)',
+                    'bookings_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"INSERT INTO bookings ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM bookings_old")
+    op.drop_table('bookings_old')
+
+
+def downgrade() -> None:
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY NONE")
+    op.rename_table('bookings', 'bookings_partitioned')
+    op.execute("ALTER TABLE bookings_partitioned RENAME CONSTRAINT bookings_pkey TO bookings_partitioned_pkey")
+
+    op.create_table('bookings',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('bookings_id_seq')"), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date_from', sa.Date(), nullable=False),
+    sa.Column('date_to', sa.Date(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Integer(), sa.Computed('(date_to - date_from) * price', ), nullable=True),
+    sa.Column('total_days', sa.Integer(), sa.Computed('date_to - date_from', ), nullable=True),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE bookings_id_seq OWNED BY bookings.id")
+
+    op.execute(f"INSERT INTO bookings ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM bookings_partitioned")
+    # партиции удаляются вместе с родительской таблицей
+    op.drop_table('bookings_partitioned')
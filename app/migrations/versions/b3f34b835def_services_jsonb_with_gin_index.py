@@ -0,0 +1,40 @@
+"""Services JSONB with GIN index
+
+Revision ID: b3f34b835def
+Revises: c0a5c85a8fd4
+Create Date: 2026-10-19 13:12:26.865998
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f34b835def'
+down_revision: Union[str, None] = 'c0a5c85a8fd4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('hotels', 'rooms'):
+        op.alter_column(table, 'services',
+                   existing_type=sa.JSON(),
+                   type_=postgresql.JSONB(),
+                   postgresql_using='services::jsonb')
+        # jsonb_path_ops: индекс меньше и быстрее, поддерживает только @>
+        op.create_index(f'ix_{table}_services', table, ['services'],
+                        postgresql_using='gin',
+                        postgresql_ops={'services': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    for table in ('rooms', 'hotels'):
+        op.drop_index(f'ix_{table}_services', table_name=table)
+        op.alter_column(table, 'services',
+                   existing_type=postgresql.JSONB(),
+                   type_=sa.JSON(),
+                   postgresql_using='services::json')
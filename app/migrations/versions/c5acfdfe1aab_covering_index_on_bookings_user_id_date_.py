@@ -0,0 +1,28 @@
+"""Covering index on bookings user_id, date_from
+
+Revision ID: c5acfdfe1aab
+Revises: 96c3149df5e1
+Create Date: 2026-10-19 13:15:26.406665
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5acfdfe1aab'
+down_revision: Union[str, None] = '96c3149df5e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # INCLUDE позволяет отдавать список броней пользователя index-only scan'ом
+    op.create_index('ix_bookings_user_id_date_from', 'bookings', ['user_id', 'date_from'],
+                    postgresql_include=['id', 'room_id', 'date_to', 'price', 'total_cost', 'total_days'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_user_id_date_from', table_name='bookings')
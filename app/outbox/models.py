@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+
+class Outbox(Base):
+    __tablename__ = 'outbox'
+
+    id = Column(BigInteger, primary_key=True)
+    # имя таблицы, в которой произошло изменение: bookings, users, ...
+    topic = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_outbox_created_at', 'created_at'),
+    )
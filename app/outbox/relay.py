@@ -0,0 +1,155 @@
+# Transactional outbox: поток изменений для кэшей всех воркеров
+# -----------------------------
+# DAO пишут событие в таблицу outbox в той же транзакции, что и само
+# изменение (record), поэтому событие появляется тогда и только тогда,
+# когда изменение закоммичено. После коммита процесс сам сразу публикует
+# свои события подписчикам app.events (dispatch) -- свои изменения видны
+# без задержки.
+#
+# OutboxRelay в каждом воркере слушает LISTEN outbox (триггер на таблице
+# делает NOTIFY при коммите вставки) и раз в OUTBOX_POLL_INTERVAL секунд
+# опрашивает таблицу на случай потерянного уведомления. События других
+# процессов публикуются локальным подписчикам, свои -- пропускаются.
+#
+# Идентификаторы выдаются при вставке, а видны после коммита, поэтому
+# событие с меньшим id может появиться позже большего. Пропуски в
+# последовательности id relay запоминает и перечитывает ещё OUTBOX_LOOKBACK
+# секунд.
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+from sqlalchemy import delete, func, insert, or_, select
+
+from app.config import settings
+from app.database import async_session_maker
+from app.events import publish
+from app.outbox.models import Outbox
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "outbox"
+# больший разрыв -- не параллельные транзакции, а, например, очистка таблицы
+MAX_GAP = 10_000
+# процесс, записавший событие
+ORIGIN = uuid.uuid4().hex
+
+
+def make_event(topic: str, operation: str, **data) -> dict:
+    # JSON-совместимый вид: подписчики получают одинаковые данные
+    # и от своего процесса, и из таблицы
+    payload = json.loads(json.dumps({"operation": operation, **data}, default=str))
+    return {"topic": topic, "payload": {**payload, "origin": ORIGIN}}
+
+
+async def record(session, events: list[dict]):
+    if events:
+        await session.execute(insert(Outbox), events)
+
+
+async def dispatch(events: list[dict]):
+    for event in events:
+        await publish(event["topic"], **event["payload"])
+
+
+class OutboxRelay:
+    def __init__(self, poll_interval: float = None, lookback: float = None, batch_size: int = 500):
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+        self.lookback = lookback or settings.OUTBOX_LOOKBACK
+        self.batch_size = batch_size
+        self.last_id = None
+        self.relayed = 0
+        # пропущенный id -> когда обнаружен
+        self._gaps: dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._connection = None
+        self._task = None
+
+    async def poll(self) -> int:
+        if self.last_id is None:
+            async with async_session_maker() as session:
+                self.last_id = (await session.execute(select(func.coalesce(func.max(Outbox.id), 0)))).scalar()
+        query = (
+            select(Outbox.id, Outbox.topic, Outbox.payload)
+            .where(or_(Outbox.id > self.last_id, Outbox.id.in_(list(self._gaps))))
+            .order_by(Outbox.id)
+            .limit(self.batch_size)
+        )
+        async with async_session_maker() as session:
+            rows = (await session.execute(query)).all()
+
+        now = time.monotonic()
+        relayed = 0
+        for row in rows:
+            if self._gaps.pop(row.id, None) is None:
+                # пропущенные id -- транзакции, которые ещё не закоммичены
+                # (или откатились): ждём их OUTBOX_LOOKBACK секунд
+                if row.id - self.last_id <= MAX_GAP:
+                    for missing_id in range(self.last_id + 1, row.id):
+                        self._gaps[missing_id] = now
+                self.last_id = row.id
+            if row.payload.get("origin") == ORIGIN:
+                continue
+            await publish(row.topic, **row.payload)
+            relayed += 1
+        self._gaps = {
+            missing_id: found_at for missing_id, found_at in self._gaps.items()
+            if now - found_at < self.lookback
+        }
+        self.relayed += relayed
+        return len(rows)
+
+    async def purge(self) -> int:
+        before = datetime.now(timezone.utc) - timedelta(seconds=settings.OUTBOX_RETENTION)
+        async with async_session_maker() as session:
+            result = await session.execute(delete(Outbox).where(Outbox.created_at < before))
+            await session.commit()
+        return result.rowcount
+
+    def _notified(self, connection, pid, channel, payload):
+        self._wakeup.set()
+
+    async def _listen(self):
+        self._connection = await asyncpg.connect(
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            user=settings.DB_USER,
+            password=settings.DB_PASS,
+            database=settings.DB_NAME,
+        )
+        await self._connection.add_listener(CHANNEL, self._notified)
+
+    async def run(self):
+        try:
+            await self._listen()
+        except (OSError, asyncpg.PostgresError):
+            logger.exception("LISTEN outbox недоступен, только опрос таблицы")
+        last_purge = 0.0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # пачками, пока есть непрочитанные события
+                while await self.poll() >= self.batch_size:
+                    pass
+                if time.monotonic() - last_purge > settings.OUTBOX_RETENTION / 10:
+                    await self.purge()
+                    last_purge = time.monotonic()
+            except Exception:
+                logger.exception("Ошибка чтения outbox")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._connection is not None:
+            await self._connection.close()
@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import and_, select
+
+from app.bookings.models import Bookings, BOOKING_MAX_DAYS
+from app.cache import cache
+from app.config import settings
+from app.database import async_session_maker
+from app.events import subscribe
+from app.pricing import engine
+from app.pricing.models import OccupancyRates, SeasonalRates, WeekdayRates
+from app.rooms.dao import RoomsDAO
+
+RATES_NAMESPACE = "pricing"
+
+
+class PricingDAO:
+    @classmethod
+    async def rate_tables(cls) -> engine.RateTables:
+        rates = cache.get(RATES_NAMESPACE, "rate_tables")
+        if rates is not None:
+            return rates
+        async with async_session_maker() as session:
+            seasons = (await session.execute(select(
+                SeasonalRates.hotel_id, SeasonalRates.date_from, SeasonalRates.date_to, SeasonalRates.rate_percent,
+            ).order_by(SeasonalRates.id))).all()
+            weekdays = (await session.execute(select(WeekdayRates.weekday, WeekdayRates.rate_percent))).all()
+            occupancy = (await session.execute(
+                select(OccupancyRates.min_occupancy_percent, OccupancyRates.rate_percent)
+            )).all()
+        rates = engine.RateTables(
+            seasons=[tuple(season) for season in seasons],
+            weekdays=dict(weekdays),
+            occupancy=[tuple(row) for row in occupancy],
+        )
+        cache.set(RATES_NAMESPACE, "rate_tables", rates, ttl=settings.PRICING_RATES_TTL)
+        return rates
+
+    @classmethod
+    def invalidate_rate_tables(cls):
+        cache.invalidate(RATES_NAMESPACE)
+
+    @classmethod
+    async def quote(cls, rooms: list, periods: list[tuple[date, date]], session=None) -> list[dict]:
+        """
+        rooms -- номера (id, hotel_id, price, quantity), periods -- период
+        проживания для каждого номера. Возвращает для каждой пары стоимость
+        (total_cost) и число свободных номеров (rooms_left).
+
+        SELECT room_id, date_from, date_to FROM bookings
+        WHERE room_id IN (:room_ids) AND date_from < :window_end AND date_to > :window_start
+        """
+        if not rooms:
+            return []
+        start, days = engine.window(periods)
+        room_ids = [room["id"] for room in rooms]
+        query = select(Bookings.room_id, Bookings.date_from, Bookings.date_to).where(and_(
+            Bookings.room_id.in_(set(room_ids)),
+            Bookings.date_from < start + timedelta(days=days),
+            # отсечение старых партиций, как в BookingDAO.overlapping
+            Bookings.date_from > start - timedelta(days=BOOKING_MAX_DAYS),
+            Bookings.date_to > start,
+        ))
+        if session is None:
+            async with async_session_maker() as session:
+                bookings = (await session.execute(query)).all()
+        else:
+            bookings = (await session.execute(query)).all()
+        rates = await cls.rate_tables()
+
+        # номер может встречаться в нескольких строках с разными периодами
+        unique_ids = sorted(set(room_ids))
+        room_index = {room_id: index for index, room_id in enumerate(unique_ids)}
+        rows = np.array([room_index[room_id] for room_id in room_ids], dtype=np.int64)
+        booking_rows = np.array([room_index[booking.room_id] for booking in bookings], dtype=np.int64)
+        booking_starts = engine.day_offsets([booking.date_from for booking in bookings], start)
+        booking_ends = engine.day_offsets([booking.date_to for booking in bookings], start)
+        starts = engine.day_offsets([date_from for date_from, _ in periods], start)
+        ends = engine.day_offsets([date_to for _, date_to in periods], start)
+        quantity = np.array([room["quantity"] for room in rooms], dtype=np.int64)
+
+        booked = engine.booked_per_day(booking_rows, booking_starts, booking_ends, len(unique_ids), days)[rows]
+        occupancy_percent = booked * 100 // np.maximum(quantity, 1)[:, None]
+        total_cost = engine.quote(
+            rates,
+            start,
+            base_prices=np.array([room["price"] for room in rooms], dtype=np.int64),
+            hotel_ids=np.array([room["hotel_id"] for room in rooms], dtype=np.int64),
+            starts=starts,
+            ends=ends,
+            occupancy_percent=occupancy_percent,
+        )
+        # свободные номера -- как в HotelsDAO.search: quantity минус брони,
+        # пересекающиеся с периодом
+        overlaps = (
+            (booking_rows[None, :] == rows[:, None])
+            & (booking_starts[None, :] < ends[:, None])
+            & (booking_ends[None, :] > starts[:, None])
+        )
+        rooms_left = quantity - overlaps.sum(axis=1)
+        return [
+            {"total_cost": int(cost), "rooms_left": int(left)}
+            for cost, left in zip(total_cost, rooms_left)
+        ]
+
+    @classmethod
+    async def min_total_costs(
+            cls,
+            hotel_ids: list[int],
+            date_from: date,
+            date_to: date,
+            room_services: list[str] = (),
+    ) -> dict[int, int]:
+        # стоимость самого дешёвого свободного номера каждого отеля за период
+        rooms = await RoomsDAO.find_for_hotels(hotel_ids, list(room_services))
+        quotes = await cls.quote(rooms, [(date_from, date_to)] * len(rooms))
+        min_costs = {}
+        for room, room_quote in zip(rooms, quotes):
+            if room_quote["rooms_left"] <= 0:
+                continue
+            hotel_id = room["hotel_id"]
+            min_costs[hotel_id] = min(min_costs.get(hotel_id, room_quote["total_cost"]), room_quote["total_cost"])
+        return min_costs
+
+
+async def invalidate_rate_tables(**payload):
+    PricingDAO.invalidate_rate_tables()
+
+
+for rates_table in (SeasonalRates, WeekdayRates, OccupancyRates):
+    subscribe(rates_table.__tablename__, invalidate_rate_tables)
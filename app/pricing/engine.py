@@ -0,0 +1,108 @@
+# Движок цен
+# -----------------------------
+# Цена ночи = базовая цена номера * сезонный коэффициент * коэффициент дня
+# недели * коэффициент загрузки номера в эту ночь (все коэффициенты в
+# процентах). Цена ночи округляется до рубля, стоимость -- сумма ночей.
+#
+# Котировки считаются для многих номеров и периодов за один проход NumPy:
+# строки матрицы -- номера (с их периодами), столбцы -- дни общего окна;
+# цикл Python идёт только по записям таблиц тарифов, не по номерам и дням.
+from datetime import date
+
+import numpy as np
+
+BASE_RATE = 100
+
+
+class RateTables:
+    def __init__(
+            self,
+            seasons: list[tuple] = (),
+            weekdays: dict[int, int] = None,
+            occupancy: list[tuple[int, int]] = (),
+    ):
+        # seasons: (hotel_id или None, date_from, date_to, rate_percent)
+        # общие сезоны применяются первыми, сезоны отелей перекрывают их
+        self.seasons = sorted(seasons, key=lambda season: season[0] is not None)
+        weekdays = weekdays or {}
+        self.weekday_rates = np.array([weekdays.get(day, BASE_RATE) for day in range(7)], dtype=np.int64)
+        occupancy = sorted(occupancy)
+        self.occupancy_thresholds = np.array([threshold for threshold, _ in occupancy], dtype=np.int64)
+        self.occupancy_rates = np.array([rate for _, rate in occupancy], dtype=np.int64)
+
+    def day_rates(self, start: date, days: int, hotel_ids: np.ndarray) -> np.ndarray:
+        # (номера x дни): сезон * день недели, в процентах в квадрате
+        season = np.full((len(hotel_ids), days), BASE_RATE, dtype=np.int64)
+        for hotel_id, date_from, date_to, rate in self.seasons:
+            first = max((date_from - start).days, 0)
+            last = min((date_to - start).days, days)
+            if first >= last:
+                continue
+            if hotel_id is None:
+                season[:, first:last] = rate
+            else:
+                season[hotel_ids == hotel_id, first:last] = rate
+        weekday = self.weekday_rates[(start.weekday() + np.arange(days)) % 7]
+        return season * weekday
+
+    def occupancy_rate(self, occupancy_percent: np.ndarray) -> np.ndarray:
+        if not len(self.occupancy_thresholds):
+            return np.full(occupancy_percent.shape, BASE_RATE, dtype=np.int64)
+        index = np.searchsorted(self.occupancy_thresholds, occupancy_percent, side='right') - 1
+        return np.where(index >= 0, self.occupancy_rates[np.maximum(index, 0)], BASE_RATE)
+
+
+def day_offsets(dates, start: date) -> np.ndarray:
+    return np.array([(value - start).days for value in dates], dtype=np.int64)
+
+
+def booked_per_day(
+        rows: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        room_count: int,
+        days: int,
+) -> np.ndarray:
+    """
+    Число броней каждого номера в каждый день окна: +1 в день заезда,
+    -1 в день выезда и накопленная сумма по дням (sweep line).
+    rows -- индекс номера для каждой брони, starts / ends -- смещения дат
+    брони от начала окна.
+    """
+    diff = np.zeros((room_count, days + 1), dtype=np.int64)
+    np.add.at(diff, (rows, np.clip(starts, 0, days)), 1)
+    np.add.at(diff, (rows, np.clip(ends, 0, days)), -1)
+    return np.cumsum(diff, axis=1)[:, :days]
+
+
+def quote(
+        rates: RateTables,
+        start: date,
+        base_prices: np.ndarray,
+        hotel_ids: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        occupancy_percent: np.ndarray,
+) -> np.ndarray:
+    """
+    Стоимость проживания для каждой строки: номер с базовой ценой
+    base_prices[i] с ночи starts[i] по ночь ends[i] - 1 (смещения от start).
+    occupancy_percent -- загрузка номеров по дням окна (строки x дни).
+    """
+    days = occupancy_percent.shape[1]
+    nightly = (
+        base_prices[:, None]
+        * rates.day_rates(start, days, hotel_ids)
+        * rates.occupancy_rate(occupancy_percent)
+    )
+    # три коэффициента в процентах -> делим на 100^3 с округлением
+    nightly = (nightly + BASE_RATE ** 3 // 2) // BASE_RATE ** 3
+    day_index = np.arange(days)
+    stay = (day_index >= starts[:, None]) & (day_index < ends[:, None])
+    return np.where(stay, nightly, 0).sum(axis=1)
+
+
+def window(periods: list[tuple[date, date]]) -> tuple[date, int]:
+    start = min(date_from for date_from, _ in periods)
+    end = max(date_to for _, date_to in periods)
+    return start, (end - start).days
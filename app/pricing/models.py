@@ -0,0 +1,40 @@
+from sqlalchemy import CheckConstraint, Column, Date, ForeignKey, Integer
+from app.database import Base
+
+
+# Коэффициенты хранятся в процентах: 100 -- базовая цена номера, 120 -- +20%
+
+
+class SeasonalRates(Base):
+    __tablename__ = 'seasonal_rates'
+
+    id = Column(Integer, primary_key=True)
+    # NULL -- сезон действует для всех отелей; сезон отеля важнее общего
+    hotel_id = Column(ForeignKey('hotels.id'), nullable=True)
+    date_from = Column(Date, nullable=False)
+    date_to = Column(Date, nullable=False)
+    rate_percent = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('date_to > date_from', name='ck_seasonal_rates_period'),
+    )
+
+
+class WeekdayRates(Base):
+    __tablename__ = 'weekday_rates'
+
+    # 0 -- понедельник, как date.weekday()
+    weekday = Column(Integer, primary_key=True, autoincrement=False)
+    rate_percent = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('weekday BETWEEN 0 AND 6', name='ck_weekday_rates_weekday'),
+    )
+
+
+class OccupancyRates(Base):
+    __tablename__ = 'occupancy_rates'
+
+    # коэффициент действует при загрузке номеров от min_occupancy_percent
+    min_occupancy_percent = Column(Integer, primary_key=True, autoincrement=False)
+    rate_percent = Column(Integer, nullable=False)
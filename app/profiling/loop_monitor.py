@@ -0,0 +1,68 @@
+# Детектор блокировок event loop
+# -----------------------------
+# Корутина-"пульс" каждые threshold / 2 секунды отмечает, что loop жив.
+# Сторожевой поток проверяет отметку; если loop не отвечает дольше
+# threshold, в лог пишется стек потока event loop в этот момент -- то есть
+# код, который его блокирует (синхронный bcrypt, тяжёлая сериализация...).
+# Об одной блокировке пишется одна запись, о её окончании -- вторая,
+# с итоговой длительностью.
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+
+class LoopStallMonitor:
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.stalls = 0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._stopped = threading.Event()
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.threshold / 2)
+
+    def _watch(self):
+        stall_started = None
+        while not self._stopped.wait(self.threshold / 4):
+            blocked = time.monotonic() - self._last_tick
+            if blocked <= self.threshold:
+                if stall_started is not None:
+                    logger.warning("event loop stall finished", extra={
+                        "stall_ms": round((time.monotonic() - stall_started) * 1000, 1),
+                    })
+                    stall_started = None
+                continue
+            if stall_started is not None:
+                continue
+            stall_started = self._last_tick
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            logger.warning("event loop blocked", extra={
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": stack,
+            })
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-monitor", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
@@ -0,0 +1,155 @@
+# Профилирование работающего приложения
+# -----------------------------
+# Два режима, оба ограничены по времени (сессия останавливается сама):
+#   cprofile -- детерминированный cProfile потока event loop (весь async-код,
+#               включая pydantic, SQLAlchemy ORM и jose); результат в pstats;
+#   sample   -- сэмплирующий профилировщик всех потоков процесса, включая
+#               threadpool (bcrypt / argon2); результат в формате speedscope
+#               (https://www.speedscope.app).
+# Одновременно идёт только одна сессия. py-spy / yappi не нужны.
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from typing import Optional
+
+
+class CProfileSession:
+    mode = "cprofile"
+    media_type = "application/octet-stream"
+    extension = "pstats"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def result(self) -> bytes:
+        self._profile.create_stats()
+        # формат файла pstats: marshal словаря stats, как в Profile.dump_stats
+        return marshal.dumps(self._profile.stats)
+
+    def summary(self, limit: int = 30) -> str:
+        self._profile.create_stats()
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+class SamplingSession:
+    mode = "sample"
+    media_type = "application/json"
+    extension = "speedscope.json"
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._frames: dict[tuple, int] = {}
+        # поток -> список стеков (индексы кадров от корня к листу)
+        self._samples: dict[int, list[list[int]]] = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._stopped_at = time.perf_counter()
+
+    def _frame_index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        if key not in self._frames:
+            self._frames[key] = len(self._frames)
+        return self._frames[key]
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_index(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.setdefault(thread_id, []).append(stack)
+
+    def result(self) -> dict:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        duration = self._stopped_at - self._started_at
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "app.profiling",
+            "shared": {
+                "frames": [
+                    {"name": name, "file": filename, "line": line}
+                    for name, filename, line in self._frames
+                ],
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_names.get(thread_id, str(thread_id)),
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": duration,
+                    "samples": samples,
+                    "weights": [self.interval] * len(samples),
+                }
+                for thread_id, samples in self._samples.items()
+            ],
+        }
+
+
+SESSIONS = {session.mode: session for session in (CProfileSession, SamplingSession)}
+
+
+class Profiler:
+    def __init__(self):
+        self.session = None
+        self.started_at: Optional[float] = None
+        self.seconds = 0.0
+        self._timer = None
+
+    @property
+    def running(self) -> bool:
+        return self._timer is not None
+
+    def start(self, loop, mode: str, seconds: float):
+        self.session = SESSIONS[mode]()
+        self.session.start()
+        self.started_at = time.time()
+        self.seconds = seconds
+        # cProfile нужно выключать в том же потоке event loop, где он включён
+        self._timer = loop.call_later(seconds, self.stop)
+
+    def stop(self):
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        self._timer = None
+        self.session.stop()
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "mode": self.session.mode if self.session else None,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "ready": self.session is not None and not self.running,
+        }
+
+
+profiler = Profiler()
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.config import settings
+from app.exceptions import ProfileNotReadyException, ProfilingAlreadyRunningException
+from app.profiling.profiler import SESSIONS, profiler
+from app.users.dependencies import get_current_admin_user
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["Профилирование"],
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+
+@router.post("/start")
+async def start_profiling(
+        mode: str = Query("sample", pattern=f"^({'|'.join(SESSIONS)})$"),
+        seconds: float = Query(10, gt=0, le=settings.PROFILING_MAX_SECONDS),
+):
+    if profiler.running:
+        raise ProfilingAlreadyRunningException
+    profiler.start(asyncio.get_running_loop(), mode, seconds)
+    return profiler.status()
+
+
+@router.post("/stop")
+async def stop_profiling():
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get("")
+async def get_profiling_status():
+    return profiler.status()
+
+
+@router.get("/result")
+async def download_profile():
+    session = profiler.session
+    if session is None or profiler.running:
+        raise ProfileNotReadyException
+    content = session.result()
+    if isinstance(content, dict):
+        content = json.dumps(content)
+    filename = f"profile-{int(profiler.started_at)}.{session.extension}"
+    return Response(
+        content=content,
+        media_type=session.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
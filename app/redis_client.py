@@ -0,0 +1,75 @@
+# Минимальный асинхронный клиент протокола Redis (RESP2)
+# -----------------------------
+# Одно соединение на процесс, команды выполняются по очереди. Поддерживаются
+# ответы, которые нужны приложению: строки, числа, bulk-строки, массивы и ошибки.
+import asyncio
+from typing import Optional
+from urllib.parse import urlparse
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args: str):
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                await self._connect()
+            try:
+                return await self._send(*args)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self._writer = None
+                raise
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", str(self.db))
+
+    async def _send(self, *args: str):
+        payload = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(payload))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _read_reply(self):
+        line = (await self._reader.readuntil(b"\r\n"))[:-2]
+        kind, body = line[:1], line[1:]
+        if kind == b"+":
+            return body.decode()
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        if kind == b"-":
+            raise RedisError(body.decode())
+        raise ConnectionError(f"Неожиданный ответ Redis: {line!r}")
@@ -0,0 +1,125 @@
+# Календарь свободных номеров отеля
+# -----------------------------
+# Для каждого номера отеля -- число свободных номеров по дням окна (до
+# квартала), закодированное сериями (run-length): [[свободно, дней], ...].
+# Загрузка считается одним проходом NumPy по интервалам броней
+# (engine.booked_per_day), как в движке цен.
+#
+# Снимки хранятся в app.cache под пространством имён отеля и сбрасываются
+# событиями "bookings" / "rooms" из outbox. Событие, пришедшее, пока снимок
+# считается, увеличивает версию отеля, и такой снимок не кэшируется.
+#
+# пример: номер на 7 мест, 3 дня всё свободно, затем 2 дня занято одно место
+# {"room_id": 10, "quantity": 7, "free": [[7, 3], [6, 2]]}
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import and_, select
+
+from app.bookings.dao import BookingDAO
+from app.bookings.models import Bookings
+from app.cache import cache
+from app.database import async_session_maker
+from app.events import subscribe
+from app.pricing import engine
+from app.rooms.dao import RoomsDAO
+from app.singleflight import get_flight
+
+AVAILABILITY_NAMESPACE = "availability"
+# квартал
+MAX_DAYS = 92
+
+availability_flight = get_flight(AVAILABILITY_NAMESPACE)
+
+# номер -> отель, для номеров, попавших в снимки
+_room_hotels: dict[int, int] = {}
+# отель -> число изменений его броней и номеров
+_versions = Counter()
+
+
+def hotel_namespace(hotel_id: int) -> tuple:
+    return (AVAILABILITY_NAMESPACE, hotel_id)
+
+
+def encode_runs(values: np.ndarray) -> list[list[int]]:
+    if not len(values):
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return [[int(value), int(length)] for value, length in zip(values[starts], lengths)]
+
+
+def decode_runs(runs: list[list[int]]) -> list[int]:
+    return [value for value, length in runs for _ in range(length)]
+
+
+async def compute(hotel_id: int, date_from: date, days: int) -> dict:
+    """
+    SELECT room_id, date_from, date_to FROM bookings
+    WHERE room_id IN (:room_ids) AND date_from < :date_to AND date_to > :date_from
+    """
+    rooms = await RoomsDAO.find_for_hotels([hotel_id])
+    # до чтения броней: бронь, закоммиченная после этой точки, либо попадёт
+    # в выборку, либо её событие изменит версию
+    _room_hotels.update((room["id"], hotel_id) for room in rooms)
+    version = _versions[hotel_id]
+    bookings = []
+    if rooms:
+        query = select(Bookings.room_id, Bookings.date_from, Bookings.date_to).where(and_(
+            Bookings.room_id.in_([room["id"] for room in rooms]),
+            BookingDAO.overlapping(date_from, date_from + timedelta(days=days)),
+        ))
+        async with async_session_maker() as session:
+            bookings = (await session.execute(query)).all()
+
+    room_index = {room["id"]: index for index, room in enumerate(rooms)}
+    booked = engine.booked_per_day(
+        rows=np.array([room_index[booking.room_id] for booking in bookings], dtype=np.int64),
+        starts=engine.day_offsets([booking.date_from for booking in bookings], date_from),
+        ends=engine.day_offsets([booking.date_to for booking in bookings], date_from),
+        room_count=len(rooms),
+        days=days,
+    )
+    quantity = np.array([room["quantity"] for room in rooms], dtype=np.int64)
+    free = np.maximum(quantity[:, None] - booked, 0)
+    snapshot = {
+        "hotel_id": hotel_id,
+        "date_from": date_from,
+        "days": days,
+        "rooms": [
+            {"room_id": room["id"], "quantity": room["quantity"], "free": encode_runs(row)}
+            for room, row in zip(rooms, free)
+        ],
+    }
+    if _versions[hotel_id] == version:
+        cache.set(hotel_namespace(hotel_id), (date_from, days), snapshot)
+    return snapshot
+
+
+async def snapshot(hotel_id: int, date_from: date, days: int) -> dict:
+    cached = cache.get(hotel_namespace(hotel_id), (date_from, days))
+    if cached is not None:
+        return cached
+    return await availability_flight.do(
+        (hotel_id, date_from, days),
+        lambda: compute(hotel_id, date_from, days),
+    )
+
+
+async def on_bookings_changed(room_id: int, **payload):
+    hotel_id = _room_hotels.get(room_id)
+    if hotel_id is not None:
+        _versions[hotel_id] += 1
+        cache.invalidate(hotel_namespace(hotel_id))
+
+
+async def on_rooms_changed(**payload):
+    # новый номер ещё не известен _room_hotels, сбрасываем все отели
+    for hotel_id in list(_versions):
+        _versions[hotel_id] += 1
+        cache.invalidate(hotel_namespace(hotel_id))
+
+
+subscribe("bookings", on_bookings_changed)
+subscribe("rooms", on_rooms_changed)
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.dao.base import BaseDAO
+from app.database import async_session_maker
+from app.rooms.models import Rooms
+
+
+class RoomsDAO(BaseDAO):
+    model = Rooms
+
+    @classmethod
+    async def find_for_hotels(cls, hotel_ids: list[int], services: Optional[list[str]] = None):
+        query = select(Rooms.__table__).where(Rooms.hotel_id.in_(hotel_ids)).order_by(Rooms.id)
+        if services:
+            query = query.where(Rooms.services.contains(services))
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return result.mappings().all()
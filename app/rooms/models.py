@@ -1,4 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, JSON
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 
 
@@ -10,6 +11,10 @@ class Rooms(Base):
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Integer, nullable=False)
-    services = Column(JSON, nullable=True)
+    services = Column(JSONB, nullable=True)
     quantity = Column(Integer, nullable=False)
     image_id = Column(Integer)
+
+    __table_args__ = (
+        Index('ix_rooms_services', 'services', postgresql_using='gin', postgresql_ops={'services': 'jsonb_path_ops'}),
+    )
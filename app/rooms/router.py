@@ -0,0 +1,31 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+
+from app.bookings.schemas import STAY_MAX_DATE, STAY_MIN_DATE, stay_period
+from app.pricing.dao import PricingDAO
+from app.rooms import availability
+from app.rooms.dao import RoomsDAO
+from app.rooms.schemas import SHotelAvailability, SRoomInfo
+
+router = APIRouter(
+    prefix="/hotels",
+    tags=["Номера"],
+)
+
+
+@router.get("/{hotel_id}/rooms")
+async def get_rooms(hotel_id: int, period: tuple[date, date] = Depends(stay_period)) -> list[SRoomInfo]:
+    date_from, date_to = period
+    rooms = await RoomsDAO.find_for_hotels([hotel_id])
+    quotes = await PricingDAO.quote(rooms, [(date_from, date_to)] * len(rooms))
+    return [{**room, **quote} for room, quote in zip(rooms, quotes)]
+
+
+@router.get("/{hotel_id}/availability")
+async def get_availability(
+        hotel_id: int,
+        date_from: date = Query(ge=STAY_MIN_DATE, le=STAY_MAX_DATE),
+        days: int = Query(availability.MAX_DAYS, ge=1, le=availability.MAX_DAYS),
+) -> SHotelAvailability:
+    return await availability.snapshot(hotel_id, date_from, days)
@@ -0,0 +1,37 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SRoom(BaseModel):
+    id: int
+    hotel_id: int
+    name: str
+    description: Optional[str] = None
+    price: int
+    services: Optional[list[str]] = None
+    quantity: int
+    image_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SRoomInfo(SRoom):
+    total_cost: int
+    rooms_left: int
+
+
+class SRoomAvailability(BaseModel):
+    room_id: int
+    quantity: int
+    # серии [свободно номеров, дней подряд]
+    free: list[tuple[int, int]]
+
+
+class SHotelAvailability(BaseModel):
+    hotel_id: int
+    date_from: date
+    days: int
+    rooms: list[SRoomAvailability]
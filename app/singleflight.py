@@ -0,0 +1,59 @@
+# Объединение одинаковых одновременных запросов (single-flight)
+# -----------------------------
+# Если запрос с тем же ключом уже выполняется, новый вызов не идёт в базу,
+# а ждёт результат уже запущенного. Результат не кэшируется: после
+# завершения запроса следующий вызов снова выполнит его.
+#
+# hotels = await search_flight.do(key, lambda: HotelsDAO.search(...))
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._in_flight: dict = {}
+
+    async def do(self, key, func):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            # запрос выполняется отдельной задачей: отмена того, кто его
+            # запустил (например, клиент отключился), не отменяет его для остальных
+            task = asyncio.create_task(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # исключение получают ожидающие; если все они отменились,
+            # asyncio не должен ругаться на непрочитанное исключение
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'shared': self.shared,
+            'hit_rate': round(self.shared / self.calls, 4) if self.calls else 0.0,
+            'in_flight': len(self._in_flight),
+        }
+
+
+_flights: dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str) -> SingleFlight:
+    if name not in _flights:
+        _flights[name] = SingleFlight(name)
+    return _flights[name]
+
+
+def stats() -> list[dict]:
+    return [flight.stats() for flight in _flights.values()]
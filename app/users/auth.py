@@ -1,47 +1,56 @@
-import bcrypt
-from jose import jwt
+import uuid
 from datetime import datetime, timedelta, timezone
+from fastapi.concurrency import run_in_threadpool
 from pydantic import EmailStr
 
 from app.users.dao import UsersDAO
+from app.users.hashing import password_policy
+from app.users.keys import sign_token, verify_token
 from app.config import settings
 
 
-# Hash a password using bcrypt
+# Hash a password according to the configured policy (bcrypt / argon2id)
 def get_password_hash(password):
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
-    return hashed_password.decode('utf-8')
+    return password_policy.hash(password)
 
 
 # Check if the provided password matches the stored password (hashed)
 def verify_password(plain_password, hashed_password):
-    password_byte_enc = plain_password.encode('utf-8')
-    if isinstance(hashed_password, str):
-        hashed_password = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(
-        password=password_byte_enc,
-        hashed_password=hashed_password
-    )
+    return password_policy.verify(plain_password, hashed_password)
 
 
-def create_access_token(data: dict) -> str:
+def _create_token(data: dict, token_type: str, expires_in: timedelta) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode,
-        key=settings.ENCRYPTION_KEY,
-        algorithm=settings.ENCRYPTION_ALGORITHM
-    )
-    return encoded_jwt
+    expire = datetime.now(timezone.utc) + expires_in
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": token_type})
+    return sign_token(to_encode)
+
+
+# data: {"sub": str(user.id), "email": user.email} -- этого достаточно,
+# чтобы get_current_user обходился без запроса к БД
+def create_access_token(data: dict) -> str:
+    return _create_token(data, "access", timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+# fid -- идентификатор семейства: все refresh-токены, полученные ротацией
+# из одного логина; повторное использование старого токена отзывает всё семейство
+def create_refresh_token(data: dict, family_id: str = None) -> str:
+    data = {**data, "fid": family_id or uuid.uuid4().hex}
+    return _create_token(data, "refresh", timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def decode_token(token: str) -> dict:
+    return verify_token(token)
 
 
 async def authenticate_user(email: EmailStr, password: str):
     user = await UsersDAO.find_one_or_none(email=email)
-    if not user and not verify_password(password, user.hashed_password):
+    # хэширование занимает сотни миллисекунд CPU -- не в event loop
+    if not user or not await run_in_threadpool(verify_password, password, user.hashed_password):
         return None
+    if password_policy.needs_rehash(user.hashed_password):
+        hashed_password = await run_in_threadpool(get_password_hash, password)
+        await UsersDAO.update(user.id, hashed_password=hashed_password)
     return user
 
 
@@ -1,42 +1,62 @@
 from fastapi import Request, Depends
-from jose import jwt, JWTError
+from jose import JWTError
 from datetime import datetime, timezone
 
 from app.config import settings
-from app.exceptions import TokenExpiredException, TokenAbsentException, IncorrectTokenFormatException, \
-    UserNotPresentException
-from app.users.dao import UsersDAO
+from app.exceptions import AdminRequiredException, TokenExpiredException, TokenAbsentException, IncorrectTokenFormatException, \
+    TokenRevokedException, UserNotPresentException
+from app.users.auth import decode_token
+from app.users.revocation import revocation_store
+from app.users.schemas import SUser
+
+ACCESS_TOKEN_COOKIE = 'booking_access_token'
+REFRESH_TOKEN_COOKIE = 'booking_refresh_token'
 
 
 def get_token(request: Request):
-    token = request.cookies.get('booking_access_token')
+    token = request.cookies.get(ACCESS_TOKEN_COOKIE)
+    if not token:
+        raise TokenAbsentException
+    return token
+
+
+def get_refresh_token(request: Request):
+    token = request.cookies.get(REFRESH_TOKEN_COOKIE)
     if not token:
         raise TokenAbsentException
     return token
 
 
-async def get_current_user(token: str = Depends(get_token)):
+async def get_token_payload(token: str, token_type: str, check_revoked: bool = True) -> dict:
     try:
-        payload = jwt.decode(
-            token=token,
-            key=settings.ENCRYPTION_KEY,
-            algorithms=[settings.ENCRYPTION_ALGORITHM],
-        )
+        payload = decode_token(token)
     except JWTError:
         raise IncorrectTokenFormatException
+    if payload.get('type') != token_type or not payload.get('jti'):
+        raise IncorrectTokenFormatException
     expire = payload.get('exp')
     if (not expire) or (int(expire) < int(datetime.now(timezone.utc).timestamp())):
         raise TokenExpiredException
+    if check_revoked and await revocation_store.is_revoked(payload['jti']):
+        raise TokenRevokedException
+    return payload
+
+
+# Проверка access-токена не обращается к БД: id и email берутся из токена,
+# отзыв проверяется по revocation_store, а короткий срок жизни токена
+# ограничивает окно, в котором изменения пользователя ещё не видны
+async def get_current_user(token: str = Depends(get_token)) -> SUser:
+    payload = await get_token_payload(token, 'access')
     user_id = payload.get('sub')
-    if not user_id:
-        raise UserNotPresentException
-    user = await UsersDAO.find_one_or_none(id=int(user_id))
-    if not user:
+    email = payload.get('email')
+    if not user_id or not email:
         raise UserNotPresentException
-    return user
+    return SUser(id=int(user_id), email=email)
 
 
-async def get_current_admin_user(current_user: UsersDAO = Depends(get_current_user)):
-    # if current_user.role != 'admin':
-    #     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+# администраторы перечислены в ADMIN_EMAILS; email берётся из токена,
+# как и в get_current_user, без запроса к БД
+async def get_current_admin_user(current_user: SUser = Depends(get_current_user)):
+    if current_user.email.lower() not in {email.lower() for email in settings.ADMIN_EMAILS}:
+        raise AdminRequiredException
     return current_user
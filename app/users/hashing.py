@@ -0,0 +1,111 @@
+# Политика хэширования паролей
+# -----------------------------
+# Схема (bcrypt или argon2id) задаётся в PASSWORD_HASH_SCHEME. Стоимость
+# хэширования подбирается при старте приложения (calibrate) так, чтобы один
+# хэш занимал около PASSWORD_HASH_TARGET_MS на этой машине, но не ниже
+# минимально допустимых параметров. Хэши, созданные другой схемой или с
+# более слабыми параметрами, пересчитываются при успешном входе (needs_rehash).
+import math
+import time
+
+import bcrypt
+from argon2 import PasswordHasher, Type, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from app.config import settings
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MAX_TIME_COST = 20
+
+
+class PasswordPolicy:
+    def __init__(
+            self,
+            scheme: str = "bcrypt",
+            bcrypt_rounds: int = 12,
+            argon2_time_cost: int = 3,
+            argon2_memory_cost: int = 64 * 1024,
+            argon2_parallelism: int = 4,
+    ):
+        self.scheme = scheme
+        self.bcrypt_rounds = bcrypt_rounds
+        self.argon2_memory_cost = argon2_memory_cost
+        self.argon2_parallelism = argon2_parallelism
+        self._set_argon2_time_cost(argon2_time_cost)
+
+    def _set_argon2_time_cost(self, time_cost: int):
+        self.argon2_time_cost = time_cost
+        self._argon2 = PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=self.argon2_memory_cost,
+            parallelism=self.argon2_parallelism,
+            type=Type.ID,
+        )
+
+    def calibrate(self, target_ms: float):
+        if self.scheme == "argon2id":
+            # время argon2 растёт линейно от time_cost
+            one_pass = _measure_ms(lambda: PasswordHasher(
+                time_cost=1,
+                memory_cost=self.argon2_memory_cost,
+                parallelism=self.argon2_parallelism,
+                type=Type.ID,
+            ).hash("calibration"))
+            time_cost = round(target_ms / max(one_pass, 1e-3))
+            self._set_argon2_time_cost(min(max(time_cost, ARGON2_MIN_TIME_COST), ARGON2_MAX_TIME_COST))
+        else:
+            # время bcrypt удваивается с каждым раундом
+            base = _measure_ms(lambda: bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS)))
+            rounds = BCRYPT_MIN_ROUNDS + round(math.log2(max(target_ms / max(base, 1e-3), 1)))
+            self.bcrypt_rounds = min(rounds, BCRYPT_MAX_ROUNDS)
+
+    def hash(self, password: str) -> str:
+        if self.scheme == "argon2id":
+            return self._argon2.hash(password)
+        salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            if hashed_password.startswith("$argon2"):
+                return self._argon2.verify(hashed_password, password)
+            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        except (VerificationError, InvalidHashError, ValueError):
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # пересчитываем только в сторону усиления, чтобы воркеры на машинах
+        # разной скорости не пересчитывали один и тот же хэш по кругу
+        if self.scheme == "argon2id":
+            if not hashed_password.startswith("$argon2id$"):
+                return True
+            parameters = extract_parameters(hashed_password)
+            return (
+                parameters.time_cost < self.argon2_time_cost
+                or parameters.memory_cost < self.argon2_memory_cost
+            )
+        if not hashed_password.startswith("$2"):
+            return True
+        return int(hashed_password.split("$")[2]) < self.bcrypt_rounds
+
+
+def _measure_ms(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+password_policy = PasswordPolicy(
+    scheme=settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+def calibrate_password_policy():
+    if settings.PASSWORD_HASH_TARGET_MS:
+        password_policy.calibrate(settings.PASSWORD_HASH_TARGET_MS)
@@ -0,0 +1,180 @@
+# Ключи подписи JWT
+# -----------------------------
+# Без JWT_KEYS_DIR используется симметричный ключ ENCRYPTION_KEY /
+# ENCRYPTION_ALGORITHM (HS256). С JWT_KEYS_DIR токены подписываются
+# асимметрично: в каталоге лежат закрытые ключи вида <kid>.<alg>.pem
+# (alg: RS256 или ES256). Подписывает ключ с наибольшим kid, проверяются
+# токены любого ключа из каталога -- по заголовку kid. Ротация: добавить
+# новый ключ, перезапустить воркеры, удалить старый ключ после истечения
+# выданных им refresh-токенов.
+#
+# Объекты ключей (jose Key) создаются один раз при загрузке, а не при
+# каждом jwt.encode / jwt.decode.
+#
+# запуск из корневого каталога:
+# python -m app.users.keys generate --algorithm ES256
+# python -m app.users.keys bench
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from jose import jwk, jwt, JWTError
+
+from app.config import settings
+
+ALGORITHMS = ('RS256', 'ES256')
+
+
+class KeySet:
+    def __init__(self, keys: dict, active_kid: str):
+        # kid -> (алгоритм, ключ подписи, ключ проверки)
+        self.keys = keys
+        self.active_kid = active_kid
+
+    def sign(self, claims: dict) -> str:
+        algorithm, signing_key, _ = self.keys[self.active_kid]
+        return jwt.encode(claims, signing_key, algorithm=algorithm, headers={'kid': self.active_kid})
+
+    def verify(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get('kid')
+        if kid not in self.keys:
+            raise JWTError(f"Неизвестный kid: {kid}")
+        algorithm, _, verifying_key = self.keys[kid]
+        return jwt.decode(token, verifying_key, algorithms=[algorithm])
+
+    def jwks(self) -> dict:
+        return {
+            'keys': [
+                {**verifying_key.to_dict(), 'kid': kid, 'alg': algorithm, 'use': 'sig'}
+                for kid, (algorithm, _, verifying_key) in self.keys.items()
+                if algorithm in ALGORITHMS
+            ]
+        }
+
+
+def construct_keys(material: str, algorithm: str) -> tuple:
+    signing_key = jwk.construct(material, algorithm)
+    verifying_key = signing_key if algorithm not in ALGORITHMS else signing_key.public_key()
+    return algorithm, signing_key, verifying_key
+
+
+def symmetric_key_set(secret: str, algorithm: str) -> KeySet:
+    return KeySet({'hs': construct_keys(secret, algorithm)}, 'hs')
+
+
+def load_key_set() -> KeySet:
+    if not settings.JWT_KEYS_DIR:
+        return symmetric_key_set(settings.ENCRYPTION_KEY, settings.ENCRYPTION_ALGORITHM)
+    keys = {}
+    for path in Path(settings.JWT_KEYS_DIR).glob('*.pem'):
+        kid, _, algorithm = path.stem.rpartition('.')
+        if algorithm not in ALGORITHMS:
+            continue
+        keys[kid] = construct_keys(path.read_text(), algorithm)
+    if not keys:
+        raise RuntimeError(f"В {settings.JWT_KEYS_DIR} нет ключей вида <kid>.<{'|'.join(ALGORITHMS)}>.pem")
+    return KeySet(keys, max(keys))
+
+
+_key_set = None
+_reloaded_at = 0.0
+
+
+def get_key_set() -> KeySet:
+    global _key_set
+    if _key_set is None:
+        _key_set = load_key_set()
+    return _key_set
+
+
+def sign_token(claims: dict) -> str:
+    return get_key_set().sign(claims)
+
+
+def verify_token(token: str) -> dict:
+    global _key_set, _reloaded_at
+    try:
+        return get_key_set().verify(token)
+    except JWTError:
+        # токен мог быть подписан новым ключом, который этот воркер ещё не
+        # загрузил; перечитываем каталог не чаще раза в минуту
+        if not settings.JWT_KEYS_DIR or time.monotonic() - _reloaded_at < 60:
+            raise
+        kid = jwt.get_unverified_header(token).get('kid')
+        if kid in get_key_set().keys:
+            raise
+        _reloaded_at = time.monotonic()
+        _key_set = load_key_set()
+        return _key_set.verify(token)
+
+
+def generate_key(directory: str, algorithm: str) -> Path:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm == 'RS256':
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    kid = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    path = Path(directory) / f"{kid}.{algorithm}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pem)
+    os.chmod(path, 0o600)
+    return path
+
+
+def _per_call_us(func, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def bench(rounds: int = 1000):
+    import tempfile
+
+    claims = {'sub': '1', 'email': 'bench@example.com', 'type': 'access', 'jti': 'x' * 32}
+    materials = {'HS256': settings.ENCRYPTION_KEY}
+    with tempfile.TemporaryDirectory() as directory:
+        for algorithm in ALGORITHMS:
+            materials[algorithm] = generate_key(directory, algorithm).read_text()
+
+    print("мкс на вызов: ключ разбирается каждый раз -> ключ разобран заранее")
+    for algorithm, material in materials.items():
+        key_set = KeySet({'k': construct_keys(material, algorithm)}, 'k')
+        token = key_set.sign(claims)
+        public_material = key_set.keys['k'][2].to_pem() if algorithm in ALGORITHMS else material
+        raw_sign = _per_call_us(lambda: jwt.encode(claims, material, algorithm=algorithm), rounds // 10)
+        raw_verify = _per_call_us(lambda: jwt.decode(token, public_material, algorithms=[algorithm]), rounds // 10)
+        sign = _per_call_us(lambda: key_set.sign(claims), rounds)
+        verify = _per_call_us(lambda: key_set.verify(token), rounds)
+        print(f"{algorithm}: sign {raw_sign:8.1f} -> {sign:8.1f}, verify {raw_verify:8.1f} -> {verify:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ключи подписи JWT")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help="создать новый ключ (он станет активным)")
+    generate.add_argument('--algorithm', choices=ALGORITHMS, default='ES256')
+    generate.add_argument('--directory', default=settings.JWT_KEYS_DIR)
+    commands.add_parser('bench', help="стоимость подписи и проверки токена")
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        if not args.directory:
+            parser.error("укажите --directory или JWT_KEYS_DIR")
+        print(generate_key(args.directory, args.algorithm))
+    else:
+        bench()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Хранилище отозванных токенов (ключ -- jti токена или fid семейства refresh-токенов)
+# -----------------------------
+# MemoryRevocationStore -- для одного процесса: bloom-фильтр отвечает
+# "точно не отозван" без поиска по словарю, словарь отсекает ложные
+# срабатывания фильтра. RedisRevocationStore -- общий для всех воркеров,
+# хранит ключи в Redis.
+# Записи живут до истечения срока действия токена.
+import hashlib
+import math
+import time
+
+from app.config import settings
+from app.redis_client import RedisClient
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        # m = -n * ln(p) / ln(2)^2, k = m / n * ln(2)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class MemoryRevocationStore:
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._expires: dict[str, float] = {}
+        self._bloom = BloomFilter(capacity)
+
+    async def revoke(self, key: str, expires_at: float):
+        if len(self._expires) >= self.capacity:
+            self._rebuild()
+        self._expires[key] = expires_at
+        self._bloom.add(key)
+
+    async def is_revoked(self, key: str) -> bool:
+        if key not in self._bloom:
+            return False
+        expires_at = self._expires.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def _rebuild(self):
+        # из bloom-фильтра нельзя удалять, поэтому после очистки
+        # просроченных записей он строится заново
+        now = time.time()
+        self._expires = {key: expires_at for key, expires_at in self._expires.items() if expires_at > now}
+        self.capacity = max(self.capacity, len(self._expires) * 2)
+        self._bloom = BloomFilter(self.capacity)
+        for key in self._expires:
+            self._bloom.add(key)
+
+
+class RedisRevocationStore:
+    key_prefix = "revoked:"
+
+    def __init__(self, url: str):
+        self.redis = RedisClient(url)
+
+    async def revoke(self, key: str, expires_at: float):
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            await self.redis.execute("SET", self.key_prefix + key, "1", "EX", str(ttl))
+
+    async def is_revoked(self, key: str) -> bool:
+        return await self.redis.execute("EXISTS", self.key_prefix + key) == 1
+
+
+revocation_store = RedisRevocationStore(settings.REDIS_URL) if settings.REDIS_URL else MemoryRevocationStore()
@@ -1,24 +1,53 @@
-from fastapi import APIRouter, Response, Depends
-
-from app.exceptions import UserAlreadyExistException, IncorrectEmailOrPasswordException
-from app.users.auth import get_password_hash, authenticate_user, create_access_token
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Request, Response, Depends
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError
+
+from app.config import settings
+from app.exceptions import UserAlreadyExistException, IncorrectEmailOrPasswordException, TokenRevokedException, \
+    UserNotPresentException
+from app.fields import FieldsSelector
+from app.users.auth import get_password_hash, authenticate_user, create_access_token, create_refresh_token, \
+    decode_token
 from app.users.dao import UsersDAO
-from app.users.dependencies import get_current_user, get_current_admin_user
-from app.users.models import Users
-from app.users.schemas import SUserAuth
+from app.users.keys import get_key_set
+from app.users.dependencies import get_current_user, get_current_admin_user, get_refresh_token, \
+    get_token_payload, ACCESS_TOKEN_COOKIE, REFRESH_TOKEN_COOKIE
+from app.users.revocation import revocation_store
+from app.users.schemas import SUser, SUserAuth
 
 router = APIRouter(
     prefix="/auth",
     tags=["Auth & Users"],
 )
 
+user_fields = FieldsSelector(SUser)
+
+
+def set_auth_cookies(response: Response, user, family_id: str = None) -> dict:
+    claims = {"sub": str(user.id), "email": user.email}
+    access_token = create_access_token(claims)
+    refresh_token = create_refresh_token(claims, family_id)
+    response.set_cookie(ACCESS_TOKEN_COOKIE, access_token, httponly=True)
+    response.set_cookie(REFRESH_TOKEN_COOKIE, refresh_token, httponly=True, path="/auth")
+    return {
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+    }
+
+
+def refresh_family_expires_at() -> float:
+    return time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
 
 @router.post("/register")
 async def register_user(user_data: SUserAuth):
     existing_user = await UsersDAO.find_one_or_none(email=user_data.email)
     if existing_user:
         raise UserAlreadyExistException
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     await UsersDAO.add(email=user_data.email, hashed_password=hashed_password)
 
 
@@ -27,29 +56,71 @@ async def login_user(response: Response, user_data: SUserAuth):
     user = await authenticate_user(user_data.email, user_data.password)
     if not user:
         raise IncorrectEmailOrPasswordException
-    access_token = create_access_token({"sub": str(user.id)})
-    response.set_cookie("booking_access_token", access_token, httponly=True)
-    return {
-        'access_token': access_token
-    }
+    return set_auth_cookies(response, user)
+
+
+# Ротация: каждый refresh-токен одноразовый. Предъявление уже
+# использованного токена означает утечку -- отзывается всё семейство
+@router.post("/refresh")
+async def refresh_tokens(response: Response, token: str = Depends(get_refresh_token)):
+    payload = await get_token_payload(token, 'refresh', check_revoked=False)
+    family_id = payload.get('fid')
+    if not family_id or await revocation_store.is_revoked(family_id):
+        raise TokenRevokedException
+    if await revocation_store.is_revoked(payload['jti']):
+        await revocation_store.revoke(family_id, refresh_family_expires_at())
+        raise TokenRevokedException
+    await revocation_store.revoke(payload['jti'], payload['exp'])
+
+    user = await UsersDAO.find_one_or_none(id=int(payload['sub']))
+    if not user:
+        raise UserNotPresentException
+    return set_auth_cookies(response, user, family_id)
 
 
 @router.post("/logout")
-async def logout_user(response: Response):
-    response.delete_cookie("booking_access_token")
+async def logout_user(request: Request, response: Response):
+    access_token = request.cookies.get(ACCESS_TOKEN_COOKIE)
+    refresh_token = request.cookies.get(REFRESH_TOKEN_COOKIE)
+    # токены разбираются независимо: access-токен обычно уже истёк,
+    # а семейство refresh-токенов отозвать нужно в любом случае
+    if access_token:
+        try:
+            payload = decode_token(access_token)
+            await revocation_store.revoke(payload['jti'], payload['exp'])
+        except (JWTError, KeyError):
+            pass
+    if refresh_token:
+        try:
+            payload = decode_token(refresh_token)
+            await revocation_store.revoke(payload['fid'], refresh_family_expires_at())
+        except (JWTError, KeyError):
+            pass
+    response.delete_cookie(ACCESS_TOKEN_COOKIE)
+    response.delete_cookie(REFRESH_TOKEN_COOKIE, path="/auth")
     return {
         "message": "User has logged out of the booking system"
     }
 
 
+# открытые ключи для проверки токенов другими сервисами (пусто для HS256)
+@router.get("/jwks")
+async def read_jwks():
+    return get_key_set().jwks()
+
+
 @router.get("/me")
-async def read_users_me(current_user: Users = Depends(get_current_user)):
+async def read_users_me(current_user: SUser = Depends(get_current_user)) -> SUser:
     return current_user
 
 
-@router.get("/all")
-async def read_users_all(current_user: Users = Depends(get_current_admin_user)):
-    return await UsersDAO.find_all()
+@router.get("/all", response_model=list[SUser])
+async def read_users_all(
+        current_user: SUser = Depends(get_current_admin_user),
+        fields: Optional[set[str]] = Depends(user_fields),
+):
+    # через схему SUser: хэши паролей в ответ не попадают
+    return user_fields.response(await UsersDAO.find_all_rows(), fields)
 
 
 # =============================================== {"sub": user.id}
@@ -3,4 +3,9 @@ from pydantic import BaseModel, EmailStr
 
 class SUserAuth(BaseModel):
     email: EmailStr
-    password: str
\ No newline at end of file
+    password: str
+
+
+class SUser(BaseModel):
+    id: int
+    email: EmailStr
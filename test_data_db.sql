@@ -23,6 +23,9 @@ INSERT INTO users (email, hashed_password) VALUES
 ('fedor@moloko.ru', 'tut_budet_hashed_password_1'),
 ('sharik@moloko.ru', 'tut_budet_hashed_password_2');
 
-INSERT INTO bookings (room_id, user_id, date_from, date_to, price) VALUES
-(1, 1, '2023-06-15', '2023-06-30', 24500),
-(7, 2, '2023-06-25', '2023-07-10', 4300);
+-- bookings партиционирована по месяцам date_from: партиции для прошлых дат создаются вручную
+CREATE TABLE IF NOT EXISTS bookings_2023_06 PARTITION OF bookings FOR VALUES FROM ('2023-06-01') TO ('2023-07-01');
+
+INSERT INTO bookings (room_id, user_id, date_from, date_to, price, total_cost) VALUES
+(1, 1, '2023-06-15', '2023-06-30', 24500, 367500),
+(7, 2, '2023-06-25', '2023-07-10', 4300, 64500);
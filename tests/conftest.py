@@ -0,0 +1,200 @@
+# Тестовое окружение
+# -----------------------------
+# Один раз на запуск поднимается временный кластер PostgreSQL из локальных
+# бинарников (initdb / pg_ctl из PATH или из каталога PG_BIN), к нему
+# применяются миграции и загружается test_data_db.sql. Каждый тест
+# выполняется внутри транзакции, которая откатывается в конце: сессии
+# из async_session_maker работают через SAVEPOINT поверх неё.
+#
+# запуск из корневого каталога:
+# pytest
+# pytest -m perf                      -- только проверки производительности
+# PERF_TOLERANCE=2 pytest -m perf     -- пороги x2 (медленная CI-машина)
+# pytest --allow-no-pg                -- без PostgreSQL пропустить тесты, а не упасть
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PERF_TOLERANCE = float(os.environ.get("PERF_TOLERANCE", "1.0"))
+
+_postgres = {}
+
+
+def _find_pg_bin():
+    if os.environ.get("PG_BIN"):
+        return Path(os.environ["PG_BIN"])
+    initdb = shutil.which("initdb")
+    return Path(initdb).parent if initdb else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_postgres(pg_bin: Path):
+    workdir = Path(tempfile.mkdtemp(prefix="booking-tests-"))
+    data_dir = workdir / "data"
+    port = _free_port()
+    subprocess.run(
+        [pg_bin / "initdb", "-D", data_dir, "-U", "postgres", "--auth=trust", "-E", "UTF8", "--no-locale"],
+        check=True, capture_output=True,
+    )
+    # durability тестовой базе не нужна
+    options = (
+        f"-p {port} -k {workdir} -c listen_addresses=127.0.0.1 "
+        "-c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+    )
+    subprocess.run(
+        [pg_bin / "pg_ctl", "-D", data_dir, "-o", options, "-l", workdir / "postgres.log", "-w", "start"],
+        check=True, capture_output=True,
+    )
+    _postgres.update(pg_bin=pg_bin, workdir=workdir, data_dir=data_dir)
+    # переменные окружения важнее .env, поэтому app.config увидит тестовую базу
+    os.environ.update(
+        DB_HOST="127.0.0.1",
+        DB_PORT=str(port),
+        DB_USER="postgres",
+        DB_PASS="postgres",
+        DB_NAME="postgres",
+    )
+
+
+def _migrate():
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ROOT_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT_DIR / "app" / "migrations"))
+    command.upgrade(config, "head")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--allow-no-pg", action="store_true",
+        help="пропустить тесты, если PostgreSQL не найден (по умолчанию -- ошибка)",
+    )
+
+
+def pytest_configure(config):
+    pg_bin = _find_pg_bin()
+    if pg_bin is None:
+        # иначе CI без PostgreSQL выглядел бы зелёным, а проверки
+        # производительности не запускались бы вовсе
+        if not config.getoption("allow_no_pg"):
+            raise pytest.UsageError(
+                "PostgreSQL не найден: добавьте initdb в PATH, укажите PG_BIN "
+                "или запустите с --allow-no-pg, чтобы пропустить тесты"
+            )
+        return
+    _start_postgres(pg_bin)
+    _migrate()
+
+
+def pytest_unconfigure(config):
+    if _postgres:
+        subprocess.run(
+            [_postgres["pg_bin"] / "pg_ctl", "-D", _postgres["data_dir"], "-m", "immediate", "stop"],
+            capture_output=True,
+        )
+        shutil.rmtree(_postgres["workdir"], ignore_errors=True)
+
+
+def pytest_collection_modifyitems(config, items):
+    if _postgres:
+        return
+    skip = pytest.mark.skip(reason="PostgreSQL не найден: добавьте initdb в PATH или укажите PG_BIN")
+    for item in items:
+        item.add_marker(skip)
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def prepare_database():
+    from app.bookings.partitions import ensure_partitions_ahead
+    from app.database import engine
+
+    raw_connection = await engine.raw_connection()
+    try:
+        await raw_connection.driver_connection.execute((ROOT_DIR / "test_data_db.sql").read_text(encoding="utf-8"))
+    finally:
+        raw_connection.close()
+    # партиции создаются заранее: DDL из другого соединения внутри теста
+    # ждал бы блокировки, которую держит откатываемая транзакция
+    await ensure_partitions_ahead()
+
+
+@pytest.fixture(autouse=True)
+async def db_transaction(prepare_database):
+    from app.cache import cache
+    from app.database import async_session_maker, engine
+
+    cache.clear()
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        async_session_maker.configure(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield connection
+        finally:
+            async_session_maker.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+            await transaction.rollback()
+    cache.clear()
+
+
+@pytest.fixture
+async def ac():
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def authenticated_ac(ac):
+    credentials = {"email": "test@test.com", "password": "test"}
+    await ac.post("/auth/register", json=credentials)
+    response = await ac.post("/auth/login", json=credentials)
+    assert response.status_code == 200
+    yield ac
+
+
+@pytest.fixture
+async def admin_ac(ac, monkeypatch):
+    from app.config import settings
+
+    credentials = {"email": "admin@test.com", "password": "admin"}
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [credentials["email"]])
+    await ac.post("/auth/register", json=credentials)
+    response = await ac.post("/auth/login", json=credentials)
+    assert response.status_code == 200
+    yield ac
+
+
+@pytest.fixture
+def perf_budget():
+    # аналог pytest-benchmark: медиана по нескольким прогонам после прогрева
+    # сравнивается с порогом, тест падает при регрессии
+    async def measure(func, max_ms: float, rounds: int = 20, warmup: int = 3) -> float:
+        for _ in range(warmup):
+            await func()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await func()
+            timings.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(timings)
+        limit = max_ms * PERF_TOLERANCE
+        assert median <= limit, f"медиана {median:.2f} ms превышает порог {limit:.2f} ms"
+        return median
+
+    return measure
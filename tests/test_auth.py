@@ -0,0 +1,91 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.parametrize("email, password, status_code", [
+    ("kot@pes.com", "kotopes", 200),
+    ("kot@pes.com", "kot0pes", 409),
+    ("abcde", "pesokot", 422),
+])
+async def test_register_user(email, password, status_code, ac: AsyncClient):
+    if status_code == 409:
+        await ac.post("/auth/register", json={"email": email, "password": password})
+    response = await ac.post("/auth/register", json={"email": email, "password": password})
+    assert response.status_code == status_code
+
+
+async def test_login_and_me(ac: AsyncClient):
+    credentials = {"email": "me@test.com", "password": "secret"}
+    await ac.post("/auth/register", json=credentials)
+
+    response = await ac.post("/auth/login", json={**credentials, "password": "wrong"})
+    assert response.status_code == 401
+
+    response = await ac.post("/auth/login", json=credentials)
+    assert response.status_code == 200
+    assert ac.cookies.get("booking_access_token")
+
+    response = await ac.get("/auth/me")
+    assert response.status_code == 200
+    assert response.json()["email"] == credentials["email"]
+
+
+async def test_me_does_not_query_database(authenticated_ac: AsyncClient):
+    from sqlalchemy import event
+
+    from app.database import engine
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        response = await authenticated_ac.get("/auth/me")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    assert statements == []
+
+
+async def test_refresh_rotation_and_reuse(authenticated_ac: AsyncClient):
+    old_refresh = authenticated_ac.cookies.get("booking_refresh_token")
+
+    response = await authenticated_ac.post("/auth/refresh")
+    assert response.status_code == 200
+    new_refresh = response.json()["refresh_token"]
+    assert new_refresh != old_refresh
+
+    # повторное предъявление использованного токена отзывает всё семейство
+    authenticated_ac.cookies.set("booking_refresh_token", old_refresh, path="/auth")
+    assert (await authenticated_ac.post("/auth/refresh")).status_code == 401
+    authenticated_ac.cookies.set("booking_refresh_token", new_refresh, path="/auth")
+    assert (await authenticated_ac.post("/auth/refresh")).status_code == 401
+
+
+async def test_logout_revokes_access_token(authenticated_ac: AsyncClient):
+    access_token = authenticated_ac.cookies.get("booking_access_token")
+    assert (await authenticated_ac.post("/auth/logout")).status_code == 200
+
+    authenticated_ac.cookies.clear()
+    authenticated_ac.cookies.set("booking_access_token", access_token)
+    response = await authenticated_ac.get("/auth/me")
+    assert response.status_code == 401
+
+
+async def test_logout_with_expired_access_token_revokes_refresh(authenticated_ac: AsyncClient):
+    from app.users.keys import sign_token
+
+    # access-токен живёт 5 минут, к моменту выхода клиент обычно шлёт истёкший
+    expired = sign_token({"sub": "1", "email": "test@test.com", "type": "access", "jti": "x", "exp": 1})
+    refresh_token = authenticated_ac.cookies.get("booking_refresh_token")
+    authenticated_ac.cookies.clear()
+    authenticated_ac.cookies.set("booking_access_token", expired)
+    authenticated_ac.cookies.set("booking_refresh_token", refresh_token, path="/auth")
+    assert (await authenticated_ac.post("/auth/logout")).status_code == 200
+
+    # украденный refresh-токен после выхода не работает
+    authenticated_ac.cookies.set("booking_refresh_token", refresh_token, path="/auth")
+    response = await authenticated_ac.post("/auth/refresh")
+    assert response.status_code == 401
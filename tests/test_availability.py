@@ -0,0 +1,68 @@
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+import numpy as np
+from httpx import AsyncClient
+
+from app.cache import cache
+from app.rooms import availability
+from app.rooms.availability import decode_runs, encode_runs
+
+# партиции bookings созданы на год вперёд
+DATE_FROM = date.today() + timedelta(days=10)
+
+
+def test_runs_roundtrip():
+    values = np.array([7, 7, 7, 6, 6, 7, 0])
+    assert encode_runs(values) == [[7, 3], [6, 2], [7, 1], [0, 1]]
+    assert decode_runs(encode_runs(values)) == values.tolist()
+    assert encode_runs(np.array([], dtype=np.int64)) == []
+
+
+async def test_hotel_quarter_availability(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/hotels/5/availability", params={"date_from": str(DATE_FROM)})
+    assert response.status_code == 200
+    rooms = {room["room_id"]: room for room in response.json()["rooms"]}
+    # у номера 10 quantity = 7
+    assert rooms[10]["free"] == [[7, 92]]
+
+    booking = {
+        "room_id": 10,
+        "date_from": str(DATE_FROM + timedelta(days=3)),
+        "date_to": str(DATE_FROM + timedelta(days=5)),
+    }
+    assert (await authenticated_ac.post("/bookings", json=booking)).status_code == 200
+
+    # снимок сброшен событием брони
+    response = await authenticated_ac.get("/hotels/5/availability", params={"date_from": str(DATE_FROM)})
+    rooms = {room["room_id"]: room for room in response.json()["rooms"]}
+    assert rooms[10]["free"] == [[7, 3], [6, 2], [7, 87]]
+
+
+async def test_availability_window_is_limited(ac: AsyncClient):
+    response = await ac.get("/hotels/5/availability", params={"date_from": str(DATE_FROM), "days": 200})
+    assert response.status_code == 422
+
+
+async def test_availability_date_is_bounded(ac: AsyncClient):
+    response = await ac.get("/hotels/5/availability", params={"date_from": "0001-01-01"})
+    assert response.status_code == 422
+
+
+async def test_booking_during_compute_is_not_cached(monkeypatch):
+    session_maker = availability.async_session_maker
+
+    @asynccontextmanager
+    async def read_then_book():
+        async with session_maker() as session:
+            yield session
+        # бронь закоммичена после чтения броней, но до записи снимка в кэш
+        await availability.on_bookings_changed(room_id=9)
+
+    monkeypatch.setattr(availability, "async_session_maker", read_then_book)
+    await availability.snapshot(5, DATE_FROM, 10)
+    assert cache.get(availability.hotel_namespace(5), (DATE_FROM, 10)) is None
+
+    monkeypatch.setattr(availability, "async_session_maker", session_maker)
+    await availability.snapshot(5, DATE_FROM, 10)
+    assert cache.get(availability.hotel_namespace(5), (DATE_FROM, 10)) is not None
@@ -0,0 +1,136 @@
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.bookings import dao as bookings_dao
+from app.bookings.dao import BookingDAO
+from app.cache import cache
+from app.database import engine
+
+DATE_FROM = date.today() + timedelta(days=30)
+DATE_TO = DATE_FROM + timedelta(days=5)
+
+
+async def test_add_and_get_booking(authenticated_ac: AsyncClient):
+    booking = {"room_id": 10, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+
+    # у номера 10 quantity = 7
+    for _ in range(7):
+        response = await authenticated_ac.post("/bookings", json=booking)
+        assert response.status_code == 200
+        assert response.json()["total_cost"] == 8000 * 5
+    response = await authenticated_ac.post("/bookings", json=booking)
+    assert response.status_code == 409
+
+    response = await authenticated_ac.get("/bookings", params={"limit": 5})
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+    response = await authenticated_ac.get("/bookings", params={"with_rooms": True, "limit": 1})
+    assert response.json()[0]["hotel_name"] == "Palace"
+
+
+async def test_delete_booking_invalidates_cache(authenticated_ac: AsyncClient):
+    booking = {"room_id": 1, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+    booking_id = (await authenticated_ac.post("/bookings", json=booking)).json()["id"]
+    assert len((await authenticated_ac.get("/bookings")).json()) == 1
+
+    response = await authenticated_ac.delete(f"/bookings/{booking_id}")
+    assert response.status_code == 204
+    assert (await authenticated_ac.get("/bookings")).json() == []
+
+    response = await authenticated_ac.delete(f"/bookings/{booking_id}")
+    assert response.status_code == 404
+
+
+async def test_batch_booking_is_all_or_nothing(authenticated_ac: AsyncClient):
+    room_10 = {"room_id": 10, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+    room_1 = {"room_id": 1, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+
+    # у номера 10 quantity = 7: восьмой номер пакета не помещается
+    response = await authenticated_ac.post("/bookings/batch", json={"bookings": [room_1] + [room_10] * 8})
+    assert response.status_code == 409
+    assert (await authenticated_ac.get("/bookings")).json() == []
+
+    response = await authenticated_ac.post("/bookings/batch", json={"bookings": [room_1] + [room_10] * 7})
+    assert response.status_code == 200
+    assert [booking["room_id"] for booking in response.json()] == [1] + [10] * 7
+    assert response.json()[1]["total_cost"] == 8000 * 5
+    assert len((await authenticated_ac.get("/bookings")).json()) == 8
+
+
+async def test_batch_booking_query_count_does_not_grow(authenticated_ac: AsyncClient):
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    async def book(room_ids: list[int]) -> int:
+        statements.clear()
+        batch = [{"room_id": room_id, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)} for room_id in room_ids]
+        response = await authenticated_ac.post("/bookings/batch", json={"bookings": batch})
+        assert response.status_code == 200
+        return len(statements)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        # первый пакет ещё заполняет кэши (пользователь, тарифы)
+        await book([1])
+        assert await book([1, 2]) == await book([3, 4, 5, 6, 7, 8, 9, 11])
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def test_batch_booking_rejects_invalid_items(authenticated_ac: AsyncClient):
+    valid = {"room_id": 1, "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+    reversed_dates = {"room_id": 1, "date_from": str(DATE_TO), "date_to": str(DATE_FROM)}
+    response = await authenticated_ac.post("/bookings/batch", json={"bookings": [valid, reversed_dates]})
+    assert response.status_code == 422
+
+    # брони пакета, разнесённые на годы, не считаются одной матрицей дней
+    far = {
+        "room_id": 1,
+        "date_from": str(DATE_FROM + timedelta(days=300)),
+        "date_to": str(DATE_TO + timedelta(days=300)),
+    }
+    response = await authenticated_ac.post("/bookings/batch", json={"bookings": [valid, far]})
+    assert response.status_code == 422
+
+
+async def test_batch_matches_sequential_bookings():
+    # у номера 10 quantity = 7: после 5 броней на весь период свободно 2
+    for _ in range(5):
+        assert await BookingDAO.add(user_id=1, room_id=10, date_from=DATE_FROM, date_to=DATE_FROM + timedelta(days=4))
+    items = [
+        (10, DATE_FROM, DATE_FROM + timedelta(days=2)),
+        (10, DATE_FROM + timedelta(days=2), DATE_FROM + timedelta(days=4)),
+        (10, DATE_FROM + timedelta(days=1), DATE_FROM + timedelta(days=3)),
+    ]
+    assert await BookingDAO.add_many(user_id=1, items=items) is None
+
+    sequential = [
+        await BookingDAO.add(user_id=1, room_id=room_id, date_from=date_from, date_to=date_to)
+        for room_id, date_from, date_to in items
+    ]
+    assert [booking is not None for booking in sequential] == [True, True, False]
+
+
+async def test_bookings_list_raced_by_booking_is_not_cached(monkeypatch):
+    session_maker = bookings_dao.async_session_maker
+
+    @asynccontextmanager
+    async def read_then_book():
+        async with session_maker() as session:
+            yield session
+        # бронь закоммичена после чтения списка, но до записи в кэш
+        BookingDAO.invalidate_user_cache(1)
+
+    monkeypatch.setattr(bookings_dao, "async_session_maker", read_then_book)
+    await BookingDAO.find_for_user(user_id=1, limit=20)
+    assert cache.get(BookingDAO.user_cache_namespace(1), (20, 0, False)) is None
+
+    monkeypatch.setattr(bookings_dao, "async_session_maker", session_maker)
+    await BookingDAO.find_for_user(user_id=1, limit=20)
+    assert cache.get(BookingDAO.user_cache_namespace(1), (20, 0, False)) is not None
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.compression import CompressionMiddleware, accepted_encodings
+from app.config import settings
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip;q=0.5, br, identity;q=0") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+
+
+async def test_streaming_response_is_compressed_by_chunks():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f'{{"chunk": {i}}}\n'.encode() * 50
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text.count("chunk") == 150
+
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+async def test_bookings_fields_and_gzip(authenticated_ac: AsyncClient, monkeypatch):
+    date_from = date.today() + timedelta(days=30)
+    booking = {"room_id": 10, "date_from": str(date_from), "date_to": str(date_from + timedelta(days=5))}
+    for _ in range(7):
+        await authenticated_ac.post("/bookings", json=booking)
+
+    response = await authenticated_ac.get("/bookings", params={"with_rooms": True})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.num_bytes_downloaded < len(response.content) / 5
+
+    response = await authenticated_ac.get("/bookings", params={"fields": "id,total_cost"})
+    assert "content-encoding" not in response.headers
+    assert all(item.keys() == {"id", "total_cost"} for item in response.json())
+
+    response = await authenticated_ac.get("/bookings", params={"fields": "id,hashed_password"})
+    assert response.status_code == 422
+
+    # список пользователей -- только для администраторов
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["test@test.com"])
+    response = await authenticated_ac.get("/auth/all", params={"fields": "email"})
+    assert {"email": "test@test.com"} in response.json()
+    assert all(item.keys() == {"email"} for item in response.json())
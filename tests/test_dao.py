@@ -0,0 +1,47 @@
+import asyncio
+
+from app.dao.base import rows_flight
+from app.events import publish
+from app.rooms.dao import RoomsDAO
+from app.rooms.schemas import SRoom
+from app.users.dao import UsersDAO
+
+
+async def test_find_all_rows_matches_orm():
+    rooms = await RoomsDAO.find_all(hotel_id=1)
+    rows = await RoomsDAO.find_all_rows(hotel_id=1)
+    assert [dict(row) for row in rows] == [
+        {column.name: getattr(room, column.name) for column in room.__table__.columns} for room in rooms
+    ]
+
+    models = await RoomsDAO.find_all_as(SRoom, hotel_id=1)
+    assert all(isinstance(model, SRoom) for model in models)
+    assert [model.id for model in models] == [room.id for room in rooms]
+
+
+async def test_find_all_rows_without_filter():
+    users = await UsersDAO.find_all_rows()
+    assert users and "hashed_password" in users[0]
+
+
+async def test_concurrent_find_all_rows_coalesced(monkeypatch):
+    shared = rows_flight.shared
+    results = await asyncio.gather(*(RoomsDAO.find_all_rows(hotel_id=1) for _ in range(3)))
+    assert rows_flight.shared - shared == 2
+    assert results[0] == results[1] and results[0] is not results[1]
+
+    # чтение после изменения таблицы не присоединяется к начатому до него;
+    # в тестах сессии делят одно соединение, поэтому запрос -- заглушка
+    selects = []
+
+    async def select_rows(**filter_by):
+        selects.append(filter_by)
+        version = len(selects)
+        await asyncio.sleep(0.01)
+        return [{"version": version}]
+
+    monkeypatch.setattr(RoomsDAO, "_select_rows", select_rows)
+    before = asyncio.create_task(RoomsDAO.find_all_rows(hotel_id=1))
+    await asyncio.sleep(0)
+    await publish("rooms", operation="update", id=1)
+    assert await asyncio.gather(before, RoomsDAO.find_all_rows(hotel_id=1)) == [[{"version": 1}], [{"version": 2}]]
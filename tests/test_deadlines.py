@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+from app import deadlines
+from app.config import settings
+from app.database import engine
+from app.deadlines import DeadlineMiddleware
+
+
+def make_app(events: list) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        return {"ok": True}
+
+    @app.get("/remaining")
+    async def get_remaining():
+        return {"remaining": deadlines.remaining()}
+
+    return app
+
+
+async def test_deadline_returns_504_and_cancels_handler():
+    events = []
+    async with AsyncClient(transport=ASGITransport(app=make_app(events)), base_url="http://test") as client:
+        response = await client.get("/remaining", headers={"X-Request-Timeout": "2"})
+        assert 0 < response.json()["remaining"] <= 2
+
+        started = time.monotonic()
+        response = await client.get("/slow", headers={"X-Request-Timeout": "0.1"})
+        assert response.status_code == 504
+        assert time.monotonic() - started < 1
+    assert events == ["cancelled"]
+
+
+async def test_client_disconnect_cancels_handler():
+    events = []
+    app = make_app(events)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/slow", "raw_path": b"/slow", "root_path": "", "query_string": b"", "headers": [],
+        "server": ("test", 80), "client": ("test", 1),
+    }
+    incoming = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if incoming:
+            return incoming.pop()
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=1)
+    assert events == ["cancelled"]
+    assert sent == []
+
+
+async def test_statement_timeout_follows_deadline():
+    token = deadlines._deadline.set(time.monotonic() + 0.2)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError) as error:
+                await conn.execute(text("SELECT pg_sleep(2)"))
+    finally:
+        deadlines._deadline.reset(token)
+    assert error.value.orig.sqlstate == deadlines.QUERY_CANCELED
+
+
+@pytest.mark.parametrize("timeout, expected", [(settings.REQUEST_TIMEOUT, 0), (1, 1)])
+async def test_statement_timeout_set_only_for_short_deadline(timeout, expected):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    token = deadlines._deadline.set(time.monotonic() + timeout)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        deadlines._deadline.reset(token)
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    assert len(statements) == 1 + expected
+    assert sum(statement.startswith("SET LOCAL statement_timeout") for statement in statements) == expected
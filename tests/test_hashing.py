@@ -0,0 +1,37 @@
+import pytest
+from httpx import AsyncClient
+
+from app.users.dao import UsersDAO
+from app.users.hashing import PasswordPolicy, password_policy
+
+
+@pytest.mark.parametrize("scheme", ["bcrypt", "argon2id"])
+def test_hash_and_verify(scheme):
+    policy = PasswordPolicy(scheme=scheme, bcrypt_rounds=4, argon2_time_cost=1, argon2_memory_cost=1024)
+    hashed_password = policy.hash("secret")
+    assert policy.verify("secret", hashed_password)
+    assert not policy.verify("wrong", hashed_password)
+    assert not policy.needs_rehash(hashed_password)
+
+
+def test_needs_rehash_only_for_weaker_hashes():
+    weak = PasswordPolicy(bcrypt_rounds=4).hash("secret")
+    strong = PasswordPolicy(bcrypt_rounds=6).hash("secret")
+    policy = PasswordPolicy(bcrypt_rounds=5)
+    assert policy.needs_rehash(weak)
+    assert not policy.needs_rehash(strong)
+    assert PasswordPolicy(scheme="argon2id").needs_rehash(strong)
+    assert not policy.verify("secret", "tut_budet_hashed_password_1")
+
+
+async def test_rehash_on_login(ac: AsyncClient, monkeypatch):
+    credentials = {"email": "rehash@test.com", "password": "secret"}
+    monkeypatch.setattr(password_policy, "bcrypt_rounds", 4)
+    await ac.post("/auth/register", json=credentials)
+
+    monkeypatch.setattr(password_policy, "scheme", "argon2id")
+    assert (await ac.post("/auth/login", json=credentials)).status_code == 200
+    user = await UsersDAO.find_one_or_none(email=credentials["email"])
+    assert user.hashed_password.startswith("$argon2id$")
+
+    assert (await ac.post("/auth/login", json=credentials)).status_code == 200
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.idempotency.middleware import IdempotencyMiddleware
+from app.idempotency.store import RedisIdempotencyStore, StoredResponse
+from app.users.dependencies import ACCESS_TOKEN_COOKIE
+
+DATE_FROM = date.today() + timedelta(days=40)
+BOOKING = {"room_id": 10, "date_from": str(DATE_FROM), "date_to": str(DATE_FROM + timedelta(days=2))}
+
+
+async def test_booking_retry_is_replayed(authenticated_ac: AsyncClient):
+    headers = {"Idempotency-Key": "booking-1"}
+    first = await authenticated_ac.post("/bookings", json=BOOKING, headers=headers)
+    assert first.status_code == 200
+    retry = await authenticated_ac.post("/bookings", json=BOOKING, headers=headers)
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len((await authenticated_ac.get("/bookings")).json()) == 1
+
+    other_body = {**BOOKING, "room_id": 9}
+    response = await authenticated_ac.post("/bookings", json=other_body, headers=headers)
+    assert response.status_code == 422
+
+    # без ключа каждый запрос выполняется
+    await authenticated_ac.post("/bookings", json=BOOKING)
+    assert len((await authenticated_ac.get("/bookings")).json()) == 2
+
+
+async def test_register_retry_is_replayed(ac: AsyncClient):
+    credentials = {"email": "retry@test.com", "password": "test"}
+    headers = {"Idempotency-Key": "register-1"}
+    assert (await ac.post("/auth/register", json=credentials, headers=headers)).status_code == 200
+    retry = await ac.post("/auth/register", json=credentials, headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert (await ac.post("/auth/register", json=credentials)).status_code == 409
+
+
+async def test_key_is_scoped_per_caller():
+    calls = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, routes={("POST", "/items")})
+
+    @app.post("/items")
+    async def create_item():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    headers = {"Idempotency-Key": "shared"}
+    for host in ("10.0.0.1", "10.0.0.2"):
+        transport = ASGITransport(app=app, client=(host, 1))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(2):
+                response = await client.post("/items", headers=headers)
+            assert response.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 2
+
+    # просроченный или поддельный токен: ключ не применяется вовсе
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        client.cookies.set(ACCESS_TOKEN_COOKIE, "expired")
+        for _ in range(2):
+            response = await client.post("/items", headers=headers)
+            assert "idempotent-replayed" not in response.headers
+    assert len(calls) == 4
+
+
+def test_redis_store_encoding():
+    response = StoredResponse("a" * 64, 200, "application/json", b'{"x":\n1}')
+    assert RedisIdempotencyStore._decode(RedisIdempotencyStore._encode(response)) == response
+    pending = StoredResponse("b" * 64)
+    assert RedisIdempotencyStore._decode(RedisIdempotencyStore._encode(pending)) == pending
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from app.database import engine
+from app.events import subscribe, unsubscribe
+from app.importer.loader import import_file
+from app.outbox.models import Outbox
+
+# импорт коммитит сам, поэтому добавленные строки удаляются после теста
+MAX_HOTEL_ID = 6
+MAX_ROOM_ID = 11
+
+
+@pytest.fixture
+async def cleanup():
+    yield
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DELETE FROM rooms WHERE id > {MAX_ROOM_ID}"))
+        await conn.execute(text(f"DELETE FROM hotels WHERE id > {MAX_HOTEL_ID}"))
+        await conn.execute(delete(Outbox).where(Outbox.payload["operation"].astext == "import"))
+        await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('rooms', 'id'), {MAX_ROOM_ID})"))
+        await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('hotels', 'id'), {MAX_HOTEL_ID})"))
+
+
+def _write_jsonl(path, rows):
+    path.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows), encoding="utf-8")
+    return path
+
+
+async def test_import_explicit_and_generated_ids(tmp_path, cleanup):
+    hotel = {"name": "Импорт", "location": "Сыктывкар", "rooms_quantity": 1}
+    path = _write_jsonl(tmp_path / "hotels.jsonl", [{"id": MAX_HOTEL_ID + 1, **hotel}, hotel])
+
+    stats = await import_file("hotels", path)
+
+    assert stats == {"read": 2, "invalid": 0, "staged": 2, "merged": 2}
+    async with engine.connect() as conn:
+        ids = (await conn.execute(text(f"SELECT id FROM hotels WHERE id > {MAX_HOTEL_ID} ORDER BY id"))).scalars()
+        assert list(ids) == [MAX_HOTEL_ID + 1, MAX_HOTEL_ID + 2]
+
+
+async def test_import_csv_skips_invalid_rows_and_orphans(tmp_path, cleanup):
+    path = tmp_path / "rooms.csv"
+    path.write_text(
+        "hotel_id,name,description,price,quantity,services\n"
+        '1,Новый номер,,1000,2,"[""Wi-Fi""]"\n'
+        "1,Без цены,,,2,\n"
+        "999,Номер без отеля,,1000,2,\n",
+        encoding="utf-8",
+    )
+
+    stats = await import_file("rooms", path)
+
+    assert stats == {"read": 3, "invalid": 1, "staged": 2, "merged": 1}
+    async with engine.connect() as conn:
+        room = (await conn.execute(text(f"SELECT * FROM rooms WHERE id > {MAX_ROOM_ID}"))).mappings().one()
+    assert (room["hotel_id"], room["name"], room["services"]) == (1, "Новый номер", ["Wi-Fi"])
+
+
+async def test_import_publishes_rooms_event(tmp_path, cleanup):
+    path = _write_jsonl(tmp_path / "rooms.jsonl", [{"hotel_id": 1, "name": "Импорт", "price": 1000, "quantity": 1}])
+    published = []
+
+    async def on_rooms(**payload):
+        published.append(payload)
+
+    subscribe("rooms", on_rooms)
+    try:
+        await import_file("rooms", path)
+    finally:
+        unsubscribe("rooms", on_rooms)
+
+    assert [(event["operation"], event["merged"]) for event in published] == [("import", 1)]
+    async with engine.connect() as conn:
+        recorded = (await conn.execute(select(Outbox.payload).where(Outbox.topic == "rooms"))).scalars().all()
+    assert [(event["operation"], event["merged"]) for event in recorded] == [("import", 1)]
@@ -0,0 +1,40 @@
+import pytest
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.users import keys
+
+
+@pytest.fixture
+def keys_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(keys, "_key_set", None)
+    monkeypatch.setattr(keys, "_reloaded_at", 0.0)
+    return tmp_path
+
+
+@pytest.mark.parametrize("algorithm", keys.ALGORITHMS)
+def test_sign_and_verify(keys_dir, algorithm):
+    path = keys.generate_key(str(keys_dir), algorithm)
+    token = keys.sign_token({"sub": "1"})
+    assert jwt.get_unverified_header(token) == {"alg": algorithm, "typ": "JWT", "kid": path.name.split(".")[0]}
+    assert keys.verify_token(token)["sub"] == "1"
+    assert [key["kid"] for key in keys.get_key_set().jwks()["keys"]] == [path.name.split(".")[0]]
+
+
+def test_rotation_keeps_old_tokens_valid(keys_dir, monkeypatch):
+    old = keys.generate_key(str(keys_dir), "ES256")
+    old_token = keys.sign_token({"sub": "1"})
+
+    # новый ключ, подписанный им токен приходит в воркер со старым набором ключей
+    new = old.with_name("99990101T000000.RS256.pem")
+    keys.generate_key(str(keys_dir), "RS256").rename(new)
+    new_token = keys.load_key_set().sign({"sub": "2"})
+    assert keys.verify_token(new_token)["sub"] == "2"
+    assert keys.get_key_set().active_kid == "99990101T000000"
+    assert keys.verify_token(old_token)["sub"] == "1"
+
+    old.unlink()
+    monkeypatch.setattr(keys, "_key_set", None)
+    with pytest.raises(JWTError):
+        keys.verify_token(old_token)
@@ -0,0 +1,47 @@
+import json
+import logging
+
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import engine
+from app.logger import JsonFormatter, request_id_var
+
+
+def test_json_formatter():
+    token = request_id_var.set("abc")
+    try:
+        record = logging.makeLogRecord({"name": "app", "levelname": "INFO", "msg": "привет %s", "args": ("мир",)})
+        record.request_id = request_id_var.get()
+        record.duration_ms = 1.5
+        entry = json.loads(JsonFormatter().format(record))
+    finally:
+        request_id_var.reset(token)
+    assert entry["message"] == "привет мир"
+    assert entry["request_id"] == "abc"
+    assert entry["duration_ms"] == 1.5
+
+
+async def test_request_log_has_request_id_and_sql_stats(ac: AsyncClient, caplog):
+    with caplog.at_level(logging.INFO, logger="app.request"):
+        response = await ac.get("/hotels", params={
+            "location": "Алтай", "date_from": "2023-06-20", "date_to": "2023-06-25",
+        }, headers={"X-Request-ID": "req-1"})
+    assert response.headers["x-request-id"] == "req-1"
+    [record] = [record for record in caplog.records if record.name == "app.request"]
+    assert record.request_id == "req-1"
+    assert record.status == 200
+    assert record.sql_count >= 1
+
+
+async def test_failed_query_is_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        async with engine.connect() as connection:
+            try:
+                await connection.execute(text("SELECT 1 / 0"))
+            except DBAPIError:
+                pass
+    [record] = [record for record in caplog.records if record.getMessage() == "query failed"]
+    assert record.statement == "SELECT 1 / 0"
+    assert record.duration_ms >= 0
@@ -0,0 +1,48 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+
+from app.database import engine
+from app.migrations import online
+
+
+def _migrate(connection):
+    context = MigrationContext.configure(connection)
+    with Operations.context(context), context.begin_transaction():
+        online.backfill("migration_test", "value = id * 2", where="value IS NULL", batch_size=10, pause=0)
+        online.set_not_null("migration_test", "value")
+        online.create_index_concurrently("ix_migration_test_value", "migration_test", ["value"])
+
+
+async def test_online_helpers_on_partitioned_table():
+    # отдельные соединения вне транзакции теста: CONCURRENTLY и пачки коммитятся сами
+    autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+    async with autocommit_engine.connect() as connection:
+        await connection.execute(text(
+            "CREATE TABLE migration_test (id int, day date, value int) PARTITION BY RANGE (day)"
+        ))
+        for year in (2020, 2021):
+            await connection.execute(text(
+                f"CREATE TABLE migration_test_{year} PARTITION OF migration_test "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            ))
+        await connection.execute(text(
+            "INSERT INTO migration_test SELECT n, DATE '2020-06-01' + n * 20, NULL FROM generate_series(1, 25) n"
+        ))
+    try:
+        async with engine.connect() as connection:
+            await connection.run_sync(_migrate)
+
+        async with autocommit_engine.connect() as connection:
+            assert (await connection.execute(text(
+                "SELECT count(*) FROM migration_test WHERE value = id * 2"
+            ))).scalar() == 25
+            assert (await connection.execute(text(
+                "SELECT attnotnull FROM pg_attribute WHERE attrelid = 'migration_test'::regclass AND attname = 'value'"
+            ))).scalar()
+            assert (await connection.execute(text(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = 'ix_migration_test_value'::regclass"
+            ))).scalar()
+    finally:
+        async with autocommit_engine.connect() as connection:
+            await connection.execute(text("DROP TABLE migration_test"))
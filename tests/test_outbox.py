@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from app.bookings.dao import BookingDAO
+from app.database import async_session_maker, engine
+from app.events import subscribe, unsubscribe
+from app.outbox.models import Outbox
+from app.outbox.relay import OutboxRelay
+
+
+async def test_booking_change_is_recorded_in_outbox():
+    date_from = date.today() + timedelta(days=40)
+    booking = await BookingDAO.add(user_id=1, room_id=1, date_from=date_from, date_to=date_from + timedelta(days=2))
+    async with async_session_maker() as session:
+        events = (await session.execute(
+            select(Outbox.payload).where(Outbox.topic == "bookings")
+        )).scalars().all()
+
+    assert events[-1]["operation"] == "insert"
+    assert events[-1]["id"] == booking.id
+
+
+async def test_relay_publishes_events_of_other_workers():
+    received = []
+
+    async def on_bookings(**payload):
+        received.append(payload)
+
+    relay = OutboxRelay()
+    await relay.poll()
+    subscribe("bookings", on_bookings)
+    # событие закоммичено "другим воркером" вне транзакции теста
+    payload = {
+        "operation": "delete", "id": 1, "user_id": 1, "room_id": 1,
+        "date_from": "2024-01-01", "date_to": "2024-01-02", "origin": "other",
+    }
+    async with engine.begin() as connection:
+        outbox_id = (await connection.execute(
+            insert(Outbox).returning(Outbox.id),
+            {"topic": "bookings", "payload": payload},
+        )).scalar()
+    try:
+        await relay.poll()
+        await relay.poll()
+    finally:
+        unsubscribe("bookings", on_bookings)
+        async with engine.begin() as connection:
+            await connection.execute(delete(Outbox).where(Outbox.id == outbox_id))
+
+    assert received == [payload]
+
@@ -0,0 +1,44 @@
+# Пороги подобраны с запасом ~5x от медианы на машине разработчика.
+# Для медленных CI-раннеров их можно ослабить через PERF_TOLERANCE.
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.bookings.dao import BookingDAO
+from app.cache import cache
+from app.hotels.dao import HotelsDAO
+
+pytestmark = pytest.mark.perf
+
+DATE_FROM = date.today() + timedelta(days=14)
+DATE_TO = DATE_FROM + timedelta(days=3)
+
+
+async def test_perf_hotels_search_dao(perf_budget):
+    await perf_budget(lambda: HotelsDAO.search("Алтай", DATE_FROM, DATE_TO), max_ms=15)
+
+
+async def test_perf_user_bookings_dao(perf_budget):
+    async def find_uncached():
+        cache.clear()
+        await BookingDAO.find_for_user(user_id=1, limit=20, with_rooms=True)
+
+    await perf_budget(find_uncached, max_ms=10)
+
+
+async def test_perf_hotels_endpoint(perf_budget, ac: AsyncClient):
+    params = {"location": "Алтай", "date_from": str(DATE_FROM), "date_to": str(DATE_TO)}
+    await perf_budget(lambda: ac.get("/hotels", params=params), max_ms=25)
+
+
+async def test_perf_bookings_endpoint(perf_budget, authenticated_ac: AsyncClient):
+    await perf_budget(lambda: authenticated_ac.get("/bookings"), max_ms=15)
+
+
+async def test_perf_core_reads_faster_than_orm(db_transaction):
+    from app.dao.bench import run_bench
+
+    results = await run_bench(rows=2000, rounds=3, connection=db_transaction)
+    for name, timings in results.items():
+        assert timings["core"] > timings["orm"], name
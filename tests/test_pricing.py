@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+
+from app.bookings.models import BOOKING_MAX_DAYS
+from app.database import async_session_maker
+from app.pricing import engine
+from app.pricing.dao import PricingDAO
+from app.pricing.models import OccupancyRates, SeasonalRates, WeekdayRates
+
+# партиции bookings созданы на год вперёд
+MONDAY = date.today() + timedelta(days=35 - date.today().weekday())
+
+
+def test_booked_per_day_sweep():
+    booked = engine.booked_per_day(
+        rows=np.array([0, 0, 1]),
+        starts=np.array([-2, 1, 3]),
+        ends=np.array([2, 3, 9]),
+        room_count=2,
+        days=5,
+    )
+    assert booked.tolist() == [[1, 2, 1, 0, 0], [0, 0, 0, 1, 1]]
+
+
+def test_quote_applies_all_rates():
+    rates = engine.RateTables(
+        seasons=[(None, MONDAY, MONDAY + timedelta(days=3), 200), (2, MONDAY, MONDAY + timedelta(days=1), 300)],
+        weekdays={5: 150, 6: 150},
+        occupancy=[(50, 110), (90, 130)],
+    )
+    totals = engine.quote(
+        rates,
+        MONDAY,
+        base_prices=np.array([1000, 1000, 1000]),
+        hotel_ids=np.array([1, 2, 1]),
+        starts=np.array([0, 0, 4]),
+        ends=np.array([2, 2, 7]),
+        occupancy_percent=np.array([[0] * 7, [50] * 7, [0, 0, 0, 0, 0, 95, 95]]),
+    )
+    # 1: две ночи по общему сезону; 2: сезон отеля, затем общий, +10% за загрузку;
+    # 3: пятница, суббота и воскресенье с загрузкой 95%
+    assert totals.tolist() == [4000, 3300 + 2200, 1000 + 1950 + 1950]
+
+
+async def test_booking_total_cost_uses_rate_tables(authenticated_ac: AsyncClient):
+    async with async_session_maker() as session:
+        await session.execute(insert(WeekdayRates).values(weekday=5, rate_percent=150))
+        await session.execute(insert(SeasonalRates).values(
+            hotel_id=None, date_from=MONDAY, date_to=MONDAY + timedelta(days=1), rate_percent=200,
+        ))
+        await session.execute(insert(OccupancyRates).values(min_occupancy_percent=100, rate_percent=500))
+        await session.commit()
+    PricingDAO.invalidate_rate_tables()
+
+    # номер 10: 8000 за ночь, пн (сезон x2) + вт..пт + сб (x1.5)
+    booking = {"room_id": 10, "date_from": str(MONDAY), "date_to": str(MONDAY + timedelta(days=6))}
+    response = await authenticated_ac.post("/bookings", json=booking)
+    assert response.json()["total_cost"] == 16000 + 4 * 8000 + 12000
+
+    response = await authenticated_ac.get("/hotels/5/rooms", params={
+        "date_from": str(MONDAY), "date_to": str(MONDAY + timedelta(days=1)),
+    })
+    room = next(room for room in response.json() if room["id"] == 10)
+    assert room == {**room, "total_cost": 16000, "rooms_left": 6}
+
+
+@pytest.mark.parametrize("date_from, date_to", [
+    (MONDAY, MONDAY),
+    (MONDAY, MONDAY - timedelta(days=1)),
+    (MONDAY, MONDAY + timedelta(days=BOOKING_MAX_DAYS + 1)),
+    (date(1, 1, 1), date(1, 1, 2)),
+])
+async def test_invalid_stay_is_rejected(authenticated_ac: AsyncClient, date_from, date_to):
+    params = {"date_from": str(date_from), "date_to": str(date_to)}
+    assert (await authenticated_ac.get("/hotels/1/rooms", params=params)).status_code == 422
+    assert (await authenticated_ac.get("/hotels", params={"location": "Алтай", **params})).status_code == 422
+    response = await authenticated_ac.post("/bookings", json={"room_id": 1, **params})
+    assert response.status_code == 422
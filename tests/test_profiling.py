@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import marshal
+import time
+
+from httpx import AsyncClient
+
+from app.profiling.loop_monitor import LoopStallMonitor
+
+
+async def test_sampling_profile_download(admin_ac: AsyncClient):
+    response = await admin_ac.get("/admin/profiling/result")
+    assert response.status_code == 404
+
+    response = await admin_ac.post("/admin/profiling/start", params={"mode": "sample", "seconds": 0.2})
+    assert response.json()["running"] is True
+    response = await admin_ac.post("/admin/profiling/start", params={"mode": "sample", "seconds": 0.2})
+    assert response.status_code == 409
+
+    await asyncio.sleep(0.3)
+    response = await admin_ac.get("/admin/profiling/result")
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["profiles"] and profile["shared"]["frames"]
+    assert all(len(p["samples"]) == len(p["weights"]) for p in profile["profiles"])
+
+
+async def test_cprofile_download(admin_ac: AsyncClient):
+    await admin_ac.post("/admin/profiling/start", params={"mode": "cprofile", "seconds": 5})
+    await admin_ac.get("/auth/me")
+    response = await admin_ac.post("/admin/profiling/stop")
+    assert response.json()["ready"] is True
+
+    response = await admin_ac.get("/admin/profiling/result")
+    stats = marshal.loads(response.content)
+    assert any(function == "verify" for _, _, function in stats)
+
+
+async def test_profiling_requires_admin(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.post("/admin/profiling/start", params={"mode": "sample", "seconds": 0.2})
+    assert response.status_code == 403
+    assert (await authenticated_ac.get("/admin/profiling/result")).status_code == 403
+    assert (await authenticated_ac.get("/metrics/singleflight")).status_code == 403
+
+
+async def test_loop_stall_is_logged(caplog):
+    monitor = LoopStallMonitor(threshold=0.05)
+    with caplog.at_level(logging.WARNING, logger="app.profiling.loop_monitor"):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)
+        await asyncio.sleep(0.1)
+        monitor.stop()
+    assert monitor.stalls == 1
+    [blocked] = [record for record in caplog.records if record.getMessage() == "event loop blocked"]
+    assert "test_loop_stall_is_logged" in blocked.stack
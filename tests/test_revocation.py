@@ -0,0 +1,23 @@
+import time
+
+from app.users.revocation import BloomFilter, MemoryRevocationStore
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 50
+
+
+async def test_memory_store_expires_and_rebuilds():
+    store = MemoryRevocationStore(capacity=4)
+    await store.revoke("expired", time.time() - 1)
+    for i in range(4):
+        await store.revoke(f"jti-{i}", time.time() + 60)
+    assert not await store.is_revoked("expired")
+    assert all([await store.is_revoked(f"jti-{i}") for i in range(4)])
+    assert not await store.is_revoked("unknown")
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import date
+
+from httpx import AsyncClient
+
+from app.hotels import search_cache
+from app.singleflight import SingleFlight
+
+
+async def test_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = 0
+
+    async def query():
+        nonlocal executions
+        executions += 1
+        execution = executions
+        await asyncio.sleep(0.01)
+        return execution
+
+    results = await asyncio.gather(*(flight.do("key", query) for _ in range(5)), flight.do("other", query))
+    assert results == [1, 1, 1, 1, 1, 2]
+    assert flight.stats() == {"name": "test", "calls": 6, "shared": 4, "hit_rate": 0.6667, "in_flight": 0}
+
+    # после завершения запрос выполняется заново
+    assert await flight.do("key", query) == 3
+
+
+async def test_error_is_shared_and_not_remembered():
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_concurrent_searches_coalesced(admin_ac: AsyncClient):
+    shared_before = search_cache.search_flight.shared
+    searches = [search_cache.search("Алтай", date(2023, 6, 20), date(2023, 6, 25)) for _ in range(3)]
+    first, *others = await asyncio.gather(*searches)
+    assert all(hotels is first for hotels in others)
+    assert search_cache.search_flight.shared - shared_before == 2
+
+    response = await admin_ac.get("/metrics/singleflight")
+    assert response.status_code == 200
+    assert "hotels_search" in {flight["name"] for flight in response.json()}